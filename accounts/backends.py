@@ -0,0 +1,27 @@
+from django.contrib.auth.backends import ModelBackend
+
+from .models import Account
+
+
+class AccountTokenBackend(ModelBackend):
+    # ModelBackend.authenticate, but the account comes back with its auth
+    # token joined so LoginView needs no second query to hand it out.
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(Account.USERNAME_FIELD)
+        if username is None or password is None:
+            return
+
+        try:
+            user = Account.objects.select_related("auth_token").get(
+                **{Account.USERNAME_FIELD: username}
+            )
+        except Account.DoesNotExist:
+            # Keep the timing of unknown emails close to a real check.
+            Account().set_password(password)
+        else:
+            if user.check_password(password) and self.user_can_authenticate(
+                user
+            ):
+                return user
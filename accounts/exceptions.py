@@ -1,2 +1,12 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
 class CannotUpdateKeyError(Exception):
     ...
+
+
+class PasswordHashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many password changes in progress, retry shortly."
+    default_code = "password_hashing_busy"
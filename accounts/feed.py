@@ -0,0 +1,74 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from accounts.models import Account
+from accounts.serializers import AccountSerializer
+
+
+def to_entry(account):
+    return (account.pk, account.date_joined, AccountSerializer(account).data)
+
+
+class NewestAccountsBuffer:
+    """
+    The latest `maxlen` signups as (pk, date_joined, serialized account),
+    newest first. Loaded from the database on first use and every `ttl`
+    seconds, so signups handled by other processes show up as well, and
+    fed by CustomUserManager in between.
+    """
+
+    def __init__(self, maxlen, ttl=None):
+        self.maxlen = maxlen
+        self.ttl = ttl
+        self._entries = []
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def get(self, count):
+        with self._lock:
+            if not self._is_fresh():
+                self._load()
+            return self._entries[:count]
+
+    def push(self, account):
+        entry = to_entry(account)
+
+        with self._lock:
+            if self._loaded_at is None:
+                return
+
+            self._entries.insert(0, entry)
+            self._entries.sort(key=lambda entry: entry[:2], reverse=True)
+            del self._entries[self.maxlen :]
+
+    def push_on_commit(self, account, using=None):
+        # Rolled back signups must not show up in the feed.
+        transaction.on_commit(lambda: self.push(account), using=using)
+
+    def clear(self):
+        with self._lock:
+            self._entries = []
+            self._loaded_at = None
+
+    def _is_fresh(self):
+        if self._loaded_at is None:
+            return False
+        if self.ttl is None:
+            return True
+        return time.monotonic() - self._loaded_at < self.ttl
+
+    def _load(self):
+        accounts = Account.objects.order_by("-date_joined", "-pk")
+        self._entries = [
+            to_entry(account) for account in accounts[: self.maxlen]
+        ]
+        self._loaded_at = time.monotonic()
+
+
+newest_accounts = NewestAccountsBuffer(
+    maxlen=getattr(settings, "ACCOUNTS_NEWEST_BUFFER_SIZE", 100),
+    ttl=getattr(settings, "ACCOUNTS_NEWEST_BUFFER_TTL", 30),
+)
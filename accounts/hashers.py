@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    # Same algorithm name as Django's hasher so existing hashes verify with
+    # it, and must_update() rehashes them on login whenever
+    # PASSWORD_HASH_ITERATIONS changes.
+
+    @property
+    def iterations(self):
+        return getattr(
+            settings,
+            "PASSWORD_HASH_ITERATIONS",
+            PBKDF2PasswordHasher.iterations,
+        )
@@ -0,0 +1,219 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+
+from accounts.exceptions import PasswordHashingBusy
+
+logger = logging.getLogger("komercio.hashing")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def init_worker(settings_module):
+    # Spawned workers start from scratch, Django has to be set up again.
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    django.setup()
+
+
+def get_workers():
+    workers = getattr(settings, "PASSWORD_HASH_WORKERS", None)
+    if workers is None:
+        return os.cpu_count() or 1
+    return workers
+
+
+def get_pool():
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=get_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+                initargs=(os.environ["DJANGO_SETTINGS_MODULE"],),
+            )
+        return _pool
+
+
+def discard_pool(pool):
+    # A worker died (OOM kill, signal, ...) and the executor refuses any new
+    # work, the next get_pool() starts a fresh one.
+    global _pool
+
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def run_on_pool(run):
+    """
+    run(pool) on the worker pool, on a new pool if the current one broke.
+    When that one breaks too, run(None) hashes in this process instead of
+    failing the request.
+    """
+    for _ in range(2):
+        pool = get_pool()
+        try:
+            return run(pool)
+        except BrokenProcessPool:
+            logger.warning("Password hashing pool broken, replacing it")
+            discard_pool(pool)
+
+    return run(None)
+
+
+def timed_make_password(password):
+    start = time.perf_counter()
+    encoded = make_password(password)
+    return encoded, time.perf_counter() - start
+
+
+def hash_passwords(passwords):
+    """
+    make_password() for every password, spread over a pool of
+    PASSWORD_HASH_WORKERS processes through `hashing_service`, so bulk
+    hashing waits for the same slots as single hashes. The workers read the
+    hasher settings when they start.
+    """
+    return hashing_service.make_passwords(passwords)
+
+
+class PasswordHashingService:
+    """
+    Hashes passwords on the worker pool so the KDF doesn't hold the request
+    thread's GIL. At most PASSWORD_HASH_MAX_PENDING hashes are in flight,
+    callers wait PASSWORD_HASH_QUEUE_TIMEOUT seconds for their slots and get
+    PasswordHashingBusy after that.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._slots = None
+        self._pending = 0
+        self.reset()
+
+    def make_password(self, password):
+        if password is None or get_workers() == 0:
+            return make_password(password)
+
+        return self.run_batch([password])[0]
+
+    def make_passwords(self, passwords):
+        """
+        make_password() for every password, in batches that hold one slot
+        per password while they run on the pool.
+        """
+        passwords = list(passwords)
+        workers = get_workers()
+        if workers == 0:
+            return [make_password(password) for password in passwords]
+
+        batch_size = min(
+            workers * 4, getattr(settings, "PASSWORD_HASH_MAX_PENDING", 64)
+        )
+        hashes = []
+        for index in range(0, len(passwords), batch_size):
+            hashes += self.run_batch(passwords[index : index + batch_size])
+        return hashes
+
+    def run_batch(self, passwords):
+        count = len(passwords)
+        slots = self.get_slots()
+        self.acquire(slots, count)
+
+        start = time.perf_counter()
+        with self._lock:
+            self._pending += count
+            self._max_pending = max(self._max_pending, self._pending)
+
+        def run(pool):
+            if pool is None:
+                return [
+                    timed_make_password(password) for password in passwords
+                ]
+            if count == 1:
+                return [
+                    pool.submit(timed_make_password, passwords[0]).result()
+                ]
+            chunksize = max(1, count // get_workers())
+            return list(
+                pool.map(timed_make_password, passwords, chunksize=chunksize)
+            )
+
+        try:
+            results = run_on_pool(run)
+        finally:
+            for _ in range(count):
+                slots.release()
+            with self._lock:
+                self._pending -= count
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._hashed += count
+            self._hash_time += sum(hash_time for _, hash_time in results)
+            self._total_time += elapsed * count
+            self._max_time = max(self._max_time, elapsed)
+
+        return [encoded for encoded, _ in results]
+
+    def acquire(self, slots, count):
+        timeout = getattr(settings, "PASSWORD_HASH_QUEUE_TIMEOUT", 5)
+        deadline = time.monotonic() + timeout
+
+        for acquired in range(count):
+            if not slots.acquire(timeout=max(0, deadline - time.monotonic())):
+                for _ in range(acquired):
+                    slots.release()
+                with self._lock:
+                    self._rejected += 1
+                raise PasswordHashingBusy()
+
+    def set_password(self, user, raw_password):
+        # Same as AbstractBaseUser.set_password, hashed on the pool.
+        user.password = self.make_password(raw_password)
+        user._password = raw_password
+
+    def get_slots(self):
+        with self._lock:
+            if self._slots is None:
+                self._slots = threading.BoundedSemaphore(
+                    getattr(settings, "PASSWORD_HASH_MAX_PENDING", 64)
+                )
+            return self._slots
+
+    def snapshot(self):
+        with self._lock:
+            hashed = self._hashed or 1
+            return {
+                "pending": self._pending,
+                "max_pending": self._max_pending,
+                "hashed": self._hashed,
+                "rejected": self._rejected,
+                "mean_hash_time": self._hash_time / hashed * 1000,
+                "mean_time": self._total_time / hashed * 1000,
+                "max_time": self._max_time * 1000,
+            }
+
+    def reset(self):
+        with self._lock:
+            self._max_pending = self._pending
+            self._hashed = 0
+            self._rejected = 0
+            self._hash_time = 0.0
+            self._total_time = 0.0
+            self._max_time = 0.0
+
+
+hashing_service = PasswordHashingService()
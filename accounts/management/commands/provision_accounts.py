@@ -0,0 +1,68 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from utils.parsers import json_loads
+
+from accounts.provisioning import provision_accounts
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates accounts in bulk from a JSON array or NDJSON file of "
+        "AccountSerializer payloads, `-` reads stdin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format",
+            choices=["json", "ndjson"],
+            help="defaults to ndjson for .ndjson/.jsonl files, json otherwise",
+        )
+        parser.add_argument("--batch-size", type=int)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        input_format = options["format"] or (
+            "ndjson" if path.endswith((".ndjson", ".jsonl")) else "json"
+        )
+
+        try:
+            if path == "-":
+                content = sys.stdin.buffer.read()
+            else:
+                with open(path, "rb") as source:
+                    content = source.read()
+        except OSError as err:
+            raise CommandError(err)
+
+        try:
+            if input_format == "ndjson":
+                items = [
+                    json_loads(line)
+                    for line in content.splitlines()
+                    if line.strip()
+                ]
+            else:
+                items = json_loads(content)
+        except ValueError as err:
+            raise CommandError(f"Invalid {input_format}: {err}")
+
+        if not isinstance(items, list):
+            raise CommandError("Expected a list of accounts.")
+
+        created, errors = provision_accounts(
+            items, batch_size=options["batch_size"]
+        )
+
+        for error in errors:
+            self.stderr.write(
+                f"row {error['index']}: {json.dumps(error['errors'])}"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {len(created)} accounts, rejected {len(errors)}."
+            )
+        )
@@ -0,0 +1,17 @@
+# Generated by Django 4.0.5 on 2026-10-18 10:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_remove_account_is_staff_remove_account_last_login'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='account',
+            index=models.Index(fields=['-date_joined'], name='account_date_joined_idx'),
+        ),
+    ]
@@ -0,0 +1,126 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import Response
+
+from accounts.feed import newest_accounts, to_entry
+
+
+class NewestAccountsPagination(BasePagination):
+    """
+    Keyset pagination over (date_joined, pk), newest first. First pages that
+    fit in `accounts.feed.newest_accounts` are served from memory.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+
+    page_size = getattr(settings, "ACCOUNTS_NEWEST_PAGE_SIZE", 20)
+    max_page_size = getattr(settings, "ACCOUNTS_NEWEST_MAX_PAGE_SIZE", 100)
+
+    invalid_cursor_message = "Invalid cursor"
+    # Cursor pks have to fit the 64 bit column they are compared to.
+    max_cursor_int = 2**63 - 1
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        if cursor is None and self.page_size < newest_accounts.maxlen:
+            entries = newest_accounts.get(self.page_size + 1)
+        else:
+            queryset = queryset.order_by("-date_joined", "-pk")
+            if cursor is not None:
+                date_joined, pk = cursor
+                queryset = queryset.filter(
+                    Q(date_joined__lt=date_joined)
+                    | Q(date_joined=date_joined, pk__lt=pk)
+                )
+            entries = [
+                to_entry(account) for account in queryset[: self.page_size + 1]
+            ]
+
+        self.has_next = len(entries) > self.page_size
+        self.page = entries[: self.page_size]
+
+        return [data for _, _, data in self.page]
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        if page_size <= 0:
+            return self.page_size
+
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            decoded = base64.urlsafe_b64decode(encoded.encode("ascii"))
+            date_joined, pk = json.loads(decoded.decode("utf-8"))
+            date_joined = parse_datetime(date_joined)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if (
+            date_joined is None
+            or not isinstance(pk, int)
+            or isinstance(pk, bool)
+            or abs(pk) > self.max_cursor_int
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+        return date_joined, pk
+
+    def encode_cursor(self, entry):
+        pk, date_joined, _ = entry
+        encoded = json.dumps(
+            [date_joined.isoformat(), pk], separators=(",", ":")
+        ).encode("utf-8")
+        return base64.urlsafe_b64encode(encoded).decode("ascii")
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        url = replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            self.encode_cursor(self.page[-1]),
+        )
+        return replace_query_param(
+            url, self.page_size_query_param, self.page_size
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
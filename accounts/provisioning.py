@@ -0,0 +1,120 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from accounts.feed import newest_accounts
+from accounts.hashing import hash_passwords
+from accounts.models import Account
+from accounts.serializers import AccountSerializer
+
+DUPLICATED_EMAIL = "account with this email already exists."
+
+
+class AccountProvisioningSerializer(AccountSerializer):
+    # Email uniqueness is checked for the whole batch with one query
+    # instead of one UniqueValidator query per row.
+    class Meta(AccountSerializer.Meta):
+        extra_kwargs = {
+            **AccountSerializer.Meta.extra_kwargs,
+            "email": {"validators": []},
+        }
+
+
+def provision_accounts(items, batch_size=None):
+    """
+    Creates accounts from `items` (AccountSerializer payloads) with batched
+    INSERTs. Returns (created, errors): `created` holds {"index", "id",
+    "email"} per account, `errors` {"index", "errors"} per rejected row.
+    """
+    batch_size = batch_size or getattr(
+        settings, "ACCOUNTS_BULK_BATCH_SIZE", 500
+    )
+    validator = AccountProvisioningSerializer()
+    rows = {}
+    errors = []
+
+    for index, item in enumerate(items):
+        try:
+            validated_data = validator.run_validation(item)
+        except ValidationError as err:
+            errors.append({"index": index, "errors": err.detail})
+            continue
+
+        email = Account.objects.normalize_email(validated_data["email"])
+        if email in rows:
+            errors.append(
+                {"index": index, "errors": {"email": [DUPLICATED_EMAIL]}}
+            )
+            continue
+
+        validated_data["email"] = email
+        rows[email] = (index, validated_data)
+
+    for email in Account.objects.filter(email__in=rows).values_list(
+        "email", flat=True
+    ):
+        index, _ = rows.pop(email)
+        errors.append(
+            {"index": index, "errors": {"email": [DUPLICATED_EMAIL]}}
+        )
+
+    hashes = hash_passwords(data["password"] for _, data in rows.values())
+    now = timezone.now()
+    accounts = {
+        email: Account(
+            is_superuser=False,
+            date_joined=now,
+            **{**data, "email": email, "password": password},
+        )
+        for (email, (_, data)), password in zip(rows.items(), hashes)
+    }
+
+    created = []
+    emails = list(accounts)
+    for start in range(0, len(emails), batch_size):
+        batch = [
+            accounts[email] for email in emails[start : start + batch_size]
+        ]
+        for account in create_batch(batch, rows, errors):
+            created.append(
+                {
+                    "index": rows[account.email][0],
+                    "id": account.id,
+                    "email": account.email,
+                }
+            )
+
+    if created:
+        transaction.on_commit(newest_accounts.clear)
+
+    created.sort(key=lambda row: row["index"])
+    errors.sort(key=lambda error: error["index"])
+    return created, errors
+
+
+def create_batch(batch, rows, errors):
+    try:
+        with transaction.atomic():
+            return Account.objects.bulk_create(batch)
+    except IntegrityError:
+        pass
+
+    # Someone else created some of these emails since the check above, and
+    # may keep doing so. Each row gets its own savepoint and error.
+    created = []
+    for account in batch:
+        try:
+            with transaction.atomic():
+                Account.objects.bulk_create([account])
+        except IntegrityError:
+            errors.append(
+                {
+                    "index": rows[account.email][0],
+                    "errors": {"email": [DUPLICATED_EMAIL]},
+                }
+            )
+        else:
+            created.append(account)
+
+    return created
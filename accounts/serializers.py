@@ -2,6 +2,7 @@ import ipdb
 from rest_framework import serializers
 
 from accounts.exceptions import CannotUpdateKeyError
+from accounts.hashing import hashing_service
 
 from .models import Account
 
@@ -69,7 +70,7 @@ class UpdateAccountSerializer(serializers.ModelSerializer):
             setattr(instance, key, value)
 
         if validated_data["password"]:
-            instance.set_password(validated_data["password"])
+            hashing_service.set_password(instance, validated_data["password"])
 
         instance.save()
 
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.feed import newest_accounts
+from accounts.models import Account
+
+
+@receiver(post_save, sender=Account)
+def refresh_newest_accounts(sender, instance, created, **kwargs):
+    # Signups are pushed by CustomUserManager, edits reload the buffer.
+    if not created:
+        newest_accounts.clear()
+
+
+@receiver(post_delete, sender=Account)
+def drop_deleted_account(sender, instance, **kwargs):
+    newest_accounts.clear()
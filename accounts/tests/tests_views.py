@@ -1,10 +1,30 @@
+import base64
+import io
+import json
+import tempfile
+import threading
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import patch
+
 import ipdb
+from accounts import hashing, views
+from accounts.feed import newest_accounts
+from accounts.exceptions import PasswordHashingBusy
+from accounts.hashing import hash_passwords, hashing_service
 from accounts.models import Account
+from accounts.provisioning import DUPLICATED_EMAIL
 from accounts.serializers import AccountSerializer
 from black import assert_equivalent
+from django.contrib.auth.hashers import check_password
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.test import override_settings
+from products.authentications import token_cache
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APITestCase
 from rest_framework.views import status
+from utils.routers import ReplicaRouter, is_pinned_to_primary
 
 
 class AccountTestView(APITestCase):
@@ -102,6 +122,97 @@ class AccountTestView(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(user.auth_token.key, response.data["token"])
 
+    def test_login_reuses_token_in_one_query(self):
+        user = Account.objects.create_user(**self.user_seller)
+        token = Token.objects.create(user=user)
+
+        with self.assertNumQueries(1):
+            response = self.client.post("/api/login/", data=self.user_seller)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["token"], token.key)
+
+    def test_login_rehashes_password_on_new_iterations(self):
+        user = Account.objects.create_user(**self.user_seller)
+
+        with override_settings(PASSWORD_HASH_ITERATIONS=1000):
+            response = self.client.post("/api/login/", data=self.user_seller)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$1000$"))
+        self.assertTrue(user.check_password(self.user_seller["password"]))
+
+    @override_settings(LOGIN_THROTTLE_RATE="2/min")
+    def test_login_attempts_are_throttled(self):
+        cache.clear()
+        Account.objects.create_user(**self.user_seller)
+        wrong_password = {**self.user_seller, "password": "wrong"}
+
+        for _ in range(2):
+            response = self.client.post("/api/login/", data=wrong_password)
+            self.assertEqual(
+                response.status_code, status.HTTP_401_UNAUTHORIZED
+            )
+
+        response = self.client.post("/api/login/", data=self.user_seller)
+        self.assertEqual(
+            response.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+
+    @override_settings(LOGIN_ADDRESS_THROTTLE_RATE="2/min")
+    def test_login_attempts_are_throttled_per_address(self):
+        cache.clear()
+        Account.objects.create_user(**self.user_seller)
+
+        for email in ("first@mail.com", "second@mail.com"):
+            response = self.client.post(
+                "/api/login/", data={"email": email, "password": "wrong"}
+            )
+            self.assertEqual(
+                response.status_code, status.HTTP_401_UNAUTHORIZED
+            )
+
+        response = self.client.post("/api/login/", data=self.user_seller)
+        self.assertEqual(
+            response.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            },
+            "shared": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "shared",
+            },
+        },
+        SHARED_CACHE_ALIAS="shared",
+        LOGIN_THROTTLE_RATE="2/min",
+    )
+    def test_login_attempts_counted_on_shared_cache(self):
+        Account.objects.create_user(**self.user_seller)
+        wrong_password = {**self.user_seller, "password": "wrong"}
+        self.addCleanup(caches["shared"].clear)
+
+        for _ in range(2):
+            self.client.post("/api/login/", data=wrong_password)
+            # Another worker doesn't share this process' default cache.
+            caches["default"].clear()
+
+        response = self.client.post("/api/login/", data=self.user_seller)
+        self.assertEqual(
+            response.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+
+    def test_login_with_non_object_body(self):
+        for body in ([], "email", [{"email": "a@a.com"}]):
+            response = self.client.post(
+                "/api/login/", data=body, format="json"
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_only_owner_can_update(self):
         user_owner = Account.objects.create_user(**self.user_seller)
         token = Token.objects.create(user=user_owner)
@@ -193,3 +304,502 @@ class AccountTestView(APITestCase):
             self.assertIn(
                 AccountSerializer(instance=account).data, response.data
             )
+
+
+@override_settings(
+    DATABASE_REPLICAS=["replica_0"], REPLICA_PIN_CACHE_ALIAS="default"
+)
+class TestAccountsReplicaRouting(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = Account.objects.create_user(
+            email="john@doe.com",
+            password="abcd",
+            first_name="John",
+            last_name="Doe",
+            is_seller=True,
+        )
+
+    def setUp(self):
+        cache.clear()
+        newest_accounts.clear()
+        self.routed = []
+
+        # Record the routing but keep the reads on the test database.
+        db_for_read = ReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            self.routed.append(db_for_read(router, model, **hints))
+            return "default"
+
+        patcher = patch.object(ReplicaRouter, "db_for_read", record)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_newest_accounts_read_from_replica(self):
+        response = self.client.get("/api/accounts/newest/5/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(self.routed), {"replica_0"})
+
+    def test_login_reads_from_default_and_pins_new_token(self):
+        response = self.client.post(
+            "/api/login/",
+            {"email": "john@doe.com", "password": "abcd"},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(self.routed), {"default"})
+        self.assertTrue(is_pinned_to_primary(self.user))
+
+    def test_account_update_pins_user(self):
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + token.key)
+
+        response = self.client.patch(
+            f"/api/accounts/{self.user.id}/",
+            {"first_name": "Johnny", "password": "abcd"},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(is_pinned_to_primary(self.user))
+
+
+class TestNewestAccounts(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.accounts = [
+            Account.objects.create_user(
+                email=f"user{index}@mail.com",
+                password="abcd",
+                first_name="User",
+                last_name=str(index),
+                is_seller=False,
+            )
+            for index in range(5)
+        ]
+        # Two signups in the same instant, the pk breaks the tie.
+        Account.objects.filter(id=cls.accounts[1].id).update(
+            date_joined=cls.accounts[2].date_joined
+        )
+        cls.newest = [f"user{index}@mail.com" for index in (4, 3, 2, 1, 0)]
+
+    def setUp(self):
+        newest_accounts.clear()
+
+    def emails(self, rows):
+        return [row["email"] for row in rows]
+
+    def test_newest_by_num(self):
+        response = self.client.get("/api/accounts/newest/3/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.emails(response.data), self.newest[:3])
+
+    def test_newest_by_num_is_bounded(self):
+        with patch.object(newest_accounts, "maxlen", 2):
+            response = self.client.get("/api/accounts/newest/10000000/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.emails(response.data), self.newest)
+
+        with patch.object(views.ListAccountsByGivenNum, "max_accounts", 2):
+            response = self.client.get("/api/accounts/newest/10000000/")
+
+        self.assertEqual(self.emails(response.data), self.newest[:2])
+
+    def test_newest_served_from_memory(self):
+        self.client.get("/api/accounts/newest/")
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/accounts/newest/?page_size=2")
+            self.client.get("/api/accounts/newest/5/")
+
+        self.assertEqual(
+            self.emails(response.data["results"]), self.newest[:2]
+        )
+        self.assertIsNotNone(response.data["next"])
+
+    def test_signup_pushed_to_buffer(self):
+        newest_accounts.get(1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/accounts/",
+                {
+                    "email": "new@mail.com",
+                    "password": "abcd",
+                    "first_name": "New",
+                    "last_name": "User",
+                    "is_seller": False,
+                },
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/accounts/newest/2/")
+
+        self.assertEqual(
+            self.emails(response.data), ["new@mail.com", self.newest[0]]
+        )
+
+    def test_account_update_reloads_buffer(self):
+        newest_accounts.get(1)
+
+        account = self.accounts[4]
+        account.first_name = "Renamed"
+        account.save()
+
+        response = self.client.get("/api/accounts/newest/1/")
+        self.assertEqual(response.data[0]["first_name"], "Renamed")
+
+    def test_feed_cursor_pagination(self):
+        seen = []
+        url = "/api/accounts/newest/?page_size=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen += self.emails(response.data["results"])
+            url = response.data["next"]
+
+        self.assertEqual(seen, self.newest)
+
+    def test_feed_invalid_cursor(self):
+        response = self.client.get("/api/accounts/newest/?cursor=abc")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        date_joined = self.accounts[0].date_joined.isoformat()
+        for pk in (True, 2**63, -(2**63) - 1, 1.5):
+            cursor = base64.urlsafe_b64encode(
+                json.dumps([date_joined, pk]).encode("utf-8")
+            ).decode("ascii")
+            response = self.client.get(
+                f"/api/accounts/newest/?cursor={cursor}"
+            )
+            self.assertEqual(
+                response.status_code, status.HTTP_404_NOT_FOUND, pk
+            )
+
+
+# Cheap hashes on the test process, the tests create many accounts.
+@override_settings(PASSWORD_HASH_ITERATIONS=1000, PASSWORD_HASH_WORKERS=0)
+class TestAccountsBulk(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.admin = Account.objects.create_superuser(
+            email="admin@admin.com",
+            password="1234",
+            first_name="Admin",
+            last_name="User",
+        )
+        cls.seller = Account.objects.create_user(
+            email="john@doe.com",
+            password="abcd",
+            first_name="John",
+            last_name="Doe",
+            is_seller=True,
+        )
+        cls.token_admin = Token.objects.create(user=cls.admin)
+        cls.token_seller = Token.objects.create(user=cls.seller)
+
+    def setUp(self):
+        token_cache.clear()
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token " + self.token_admin.key
+        )
+
+    def build_accounts(self, count, prefix="seller"):
+        return [
+            {
+                "email": f"{prefix}{index}@bulk.com",
+                "password": f"password{index}",
+                "first_name": "Bulk",
+                "last_name": str(index),
+                "is_seller": True,
+            }
+            for index in range(count)
+        ]
+
+    def test_bulk_create_accounts(self):
+        accounts = self.build_accounts(50)
+
+        # token lookup, existing emails, savepoint, insert, release
+        with self.assertNumQueries(5):
+            response = self.client.post(
+                "/api/accounts/bulk/", accounts, format="json"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["created"]), 50)
+        self.assertEqual(response.data["errors"], [])
+
+        account = Account.objects.get(id=response.data["created"][7]["id"])
+        self.assertEqual(account.email, "seller7@bulk.com")
+        self.assertTrue(account.is_seller)
+        self.assertFalse(account.is_superuser)
+        self.assertTrue(account.check_password("password7"))
+
+    def test_bulk_create_reports_row_errors(self):
+        accounts = self.build_accounts(3)
+        accounts.append({"email": "not an email", "password": "x"})
+        accounts.append(dict(accounts[0], first_name="Again"))
+        accounts.append(dict(accounts[1], email="john@doe.com"))
+
+        response = self.client.post(
+            "/api/accounts/bulk/", accounts, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [row["index"] for row in response.data["created"]], [0, 1, 2]
+        )
+        self.assertEqual(
+            [error["index"] for error in response.data["errors"]], [3, 4, 5]
+        )
+        self.assertIn("email", response.data["errors"][0]["errors"])
+        self.assertIn("first_name", response.data["errors"][0]["errors"])
+        self.assertEqual(
+            response.data["errors"][1]["errors"],
+            {"email": ["account with this email already exists."]},
+        )
+        self.assertEqual(
+            response.data["errors"][2]["errors"],
+            {"email": ["account with this email already exists."]},
+        )
+
+    def test_bulk_create_concurrent_signups(self):
+        accounts = self.build_accounts(4)
+        bulk_create = Account.objects.bulk_create
+
+        def signup(index):
+            Account.objects.create_user(
+                email=f"seller{index}@bulk.com",
+                password="taken",
+                first_name="Taken",
+                last_name=str(index),
+                is_seller=False,
+            )
+
+        def racing_hash_passwords(passwords):
+            # Lands after the existing emails check, before the insert.
+            signup(1)
+            return hash_passwords(passwords)
+
+        calls = []
+
+        def racing_bulk_create(batch, *args, **kwargs):
+            # Lands after the batch insert failed, before the retry.
+            calls.append(len(batch))
+            if len(calls) == 2:
+                signup(2)
+            return bulk_create(batch, *args, **kwargs)
+
+        with patch(
+            "accounts.provisioning.hash_passwords", racing_hash_passwords
+        ), patch.object(
+            Account.objects, "bulk_create", side_effect=racing_bulk_create
+        ):
+            response = self.client.post(
+                "/api/accounts/bulk/", accounts, format="json"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [row["index"] for row in response.data["created"]], [0, 3]
+        )
+        self.assertEqual(
+            response.data["errors"],
+            [
+                {"index": index, "errors": {"email": [DUPLICATED_EMAIL]}}
+                for index in (1, 2)
+            ],
+        )
+        self.assertTrue(
+            Account.objects.get(email="seller3@bulk.com").check_password(
+                "password3"
+            )
+        )
+
+    def test_bulk_create_nothing_created(self):
+        response = self.client.post(
+            "/api/accounts/bulk/",
+            [{"email": "john@doe.com", "password": "x"}],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post("/api/accounts/bulk/", [], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with patch.object(views.AccountsBulkView, "max_items", 2):
+            response = self.client.post(
+                "/api/accounts/bulk/", self.build_accounts(3), format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create_requires_superuser(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token " + self.token_seller.key
+        )
+        response = self.client.post(
+            "/api/accounts/bulk/", self.build_accounts(1), format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(PASSWORD_HASH_WORKERS=2)
+    def test_hash_passwords_on_process_pool(self):
+        hashes = hash_passwords(["first", "second", "third"])
+
+        self.assertEqual(len(set(hashes)), 3)
+        self.assertTrue(check_password("second", hashes[1]))
+
+    def test_provision_accounts_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson") as source:
+            for account in self.build_accounts(3, prefix="command"):
+                source.write(json.dumps(account) + "\n")
+            source.write(json.dumps({"email": "john@doe.com"}) + "\n")
+            source.flush()
+
+            stdout, stderr = io.StringIO(), io.StringIO()
+            call_command(
+                "provision_accounts", source.name, stdout=stdout, stderr=stderr
+            )
+
+        self.assertIn("Created 3 accounts, rejected 1.", stdout.getvalue())
+        self.assertIn("row 3:", stderr.getvalue())
+        self.assertEqual(
+            Account.objects.filter(email__startswith="command").count(), 3
+        )
+
+
+@override_settings(PASSWORD_HASH_WORKERS=1)
+class TestPasswordHashingService(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.admin = Account.objects.create_superuser(
+            email="admin@admin.com",
+            password="1234",
+            first_name="Admin",
+            last_name="User",
+        )
+        cls.token_admin = Token.objects.create(user=cls.admin)
+
+        cls.account = {
+            "email": "john@doe.com",
+            "password": "abcd",
+            "first_name": "John",
+            "last_name": "Doe",
+            "is_seller": True,
+        }
+
+    def setUp(self):
+        token_cache.clear()
+        hashing_service.reset()
+
+    def test_signup_and_password_update_hash_on_pool(self):
+        response = self.client.post("/api/accounts/", self.account)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        account = Account.objects.get(email="john@doe.com")
+        self.assertTrue(account.check_password("abcd"))
+
+        token = Token.objects.create(user=account)
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + token.key)
+        response = self.client.patch(
+            f"/api/accounts/{account.id}/", {"password": "efgh"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        account.refresh_from_db()
+        self.assertTrue(account.check_password("efgh"))
+
+        stats = hashing_service.snapshot()
+        self.assertEqual(stats["hashed"], 2)
+        self.assertEqual(stats["pending"], 0)
+        self.assertGreater(stats["mean_hash_time"], 0)
+
+    @override_settings(PASSWORD_HASH_QUEUE_TIMEOUT=0)
+    def test_signup_rejected_when_pool_is_full(self):
+        slots = threading.BoundedSemaphore(1)
+        slots.acquire()
+
+        with patch.object(hashing_service, "get_slots", return_value=slots):
+            response = self.client.post("/api/accounts/", self.account)
+
+        self.assertEqual(
+            response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        self.assertFalse(Account.objects.filter(email="john@doe.com").exists())
+        self.assertEqual(hashing_service.snapshot()["rejected"], 1)
+
+    def test_hash_passwords_go_through_service(self):
+        hashes = hash_passwords(["first", "second", "third"])
+
+        self.assertTrue(check_password("third", hashes[2]))
+        stats = hashing_service.snapshot()
+        self.assertEqual(stats["hashed"], 3)
+        self.assertEqual(stats["pending"], 0)
+        self.assertGreater(stats["mean_hash_time"], 0)
+
+        slots = threading.BoundedSemaphore(2)
+        slots.acquire()
+        with override_settings(PASSWORD_HASH_QUEUE_TIMEOUT=0):
+            with patch.object(
+                hashing_service, "get_slots", return_value=slots
+            ):
+                with self.assertRaises(PasswordHashingBusy):
+                    hash_passwords(["a", "b"])
+
+        self.assertEqual(hashing_service.snapshot()["rejected"], 1)
+        # The slot taken before the batch gave up was handed back.
+        self.assertTrue(slots.acquire(blocking=False))
+
+    def test_broken_pool_is_replaced(self):
+        class BrokenPool:
+            def __init__(self):
+                self.shut_down = False
+
+            def submit(self, *args):
+                future = Future()
+                future.set_exception(BrokenProcessPool("worker died"))
+                return future
+
+            def map(self, *args, **kwargs):
+                raise BrokenProcessPool("worker died")
+
+            def shutdown(self, wait=True):
+                self.shut_down = True
+
+        broken = BrokenPool()
+        with patch.object(hashing, "_pool", broken):
+            with self.assertLogs("komercio.hashing", "WARNING"):
+                response = self.client.post("/api/accounts/", self.account)
+            self.assertIsNot(hashing._pool, broken)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(broken.shut_down)
+        account = Account.objects.get(email="john@doe.com")
+        self.assertTrue(account.check_password("abcd"))
+
+        # Pools that keep breaking end up hashing in this process.
+        with patch.object(hashing, "get_pool", BrokenPool):
+            with self.assertLogs("komercio.hashing", "WARNING"):
+                encoded = hashing_service.make_password("efgh")
+                passwords = hash_passwords(["a", "b"])
+
+        self.assertTrue(check_password("efgh", encoded))
+        self.assertTrue(check_password("b", passwords[1]))
+
+    def test_hashing_stats_in_metrics(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token " + self.token_admin.key
+        )
+        response = self.client.get("/api/metrics/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("pending", response.data["password_hashing"])
+        self.assertIn("mean_hash_time", response.data["password_hashing"])
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SharedCacheRateThrottle(SimpleRateThrottle):
+    # Attempts are counted on the cache every worker sees, the default one
+    # is per process when no shared cache is configured.
+
+    @property
+    def cache(self):
+        alias = getattr(settings, "SHARED_CACHE_ALIAS", None)
+        return caches[alias or DEFAULT_CACHE_ALIAS]
+
+
+class LoginRateThrottle(SharedCacheRateThrottle):
+    # Every login attempt costs a full password hash, so attempts are capped
+    # per email and client address.
+
+    scope = "login"
+
+    def get_rate(self):
+        return getattr(settings, "LOGIN_THROTTLE_RATE", "10/min")
+
+    def get_cache_key(self, request, view):
+        # The body isn't validated yet, a list or a string has no email and
+        # falls back to the client address alone.
+        email = ""
+        if isinstance(request.data, dict):
+            email = str(request.data.get("email", "")).strip().lower()
+
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": f"{email}:{self.get_ident(request)}",
+        }
+
+
+class LoginAddressRateThrottle(SharedCacheRateThrottle):
+    # Caps attempts from one client address whatever emails it tries.
+
+    scope = "login_address"
+
+    def get_rate(self):
+        return getattr(settings, "LOGIN_ADDRESS_THROTTLE_RATE", "100/min")
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": self.get_ident(request),
+        }
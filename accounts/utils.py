@@ -1,6 +1,8 @@
 from django.contrib.auth.models import BaseUserManager
 from django.utils import timezone
 
+from accounts.hashing import hashing_service
+
 
 class CustomUserManager(BaseUserManager):
     def _create_user(
@@ -21,9 +23,14 @@ class CustomUserManager(BaseUserManager):
             **extra_fields
         )
 
-        user.set_password(password)
+        hashing_service.set_password(user, password)
         user.save(using=self._db)
 
+        # accounts.models imports this module, the feed imports the models.
+        from accounts.feed import newest_accounts
+
+        newest_accounts.push_on_commit(user, using=self._db)
+
         return user
 
     def create_user(self, email, password, is_seller, **extra_fields):
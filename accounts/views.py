@@ -1,11 +1,22 @@
 import ipdb
+from django.conf import settings
+from products.authentications import CachedTokenAuthentication
+from products.parsers import NDJSONParser
 from rest_framework import generics, views
-from rest_framework.authentication import TokenAuthentication, authenticate
+from rest_framework.authentication import authenticate
 from rest_framework.authtoken.models import Token
 from rest_framework.views import Response, status
+from utils.mixins import ReplicaReadsMixin
+from utils.parsers import FastJSONParser
+from utils.permissions import IsSuperuser
+from utils.routers import pin_to_primary
 
 from accounts.exceptions import CannotUpdateKeyError
+from accounts.feed import newest_accounts
+from accounts.pagination import NewestAccountsPagination
 from accounts.permissions import AccountOwner, UpdateIsActive
+from accounts.provisioning import provision_accounts
+from accounts.throttles import LoginAddressRateThrottle, LoginRateThrottle
 
 from .models import Account
 from .serializers import (
@@ -21,17 +32,73 @@ class AccountView(generics.ListCreateAPIView):
     serializer_class = AccountSerializer
 
 
-class ListAccountsByGivenNum(generics.ListAPIView):
+class AccountsBulkView(generics.GenericAPIView):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsSuperuser]
+    parser_classes = [FastJSONParser, NDJSONParser]
+
+    max_items = getattr(settings, "ACCOUNTS_BULK_MAX_ITEMS", 10000)
+
+    def post(self, request):
+        items = request.data
+
+        if not isinstance(items, list) or not items:
+            return Response(
+                {"detail": "Expected a non-empty list of accounts."},
+                status.HTTP_400_BAD_REQUEST,
+            )
+
+        if len(items) > self.max_items:
+            return Response(
+                {
+                    "detail": "Ensure this list has no more than "
+                    f"{self.max_items} accounts."
+                },
+                status.HTTP_400_BAD_REQUEST,
+            )
+
+        created, errors = provision_accounts(items)
+
+        if not created:
+            return Response(
+                {"created": created, "errors": errors},
+                status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(
+            {"created": created, "errors": errors}, status.HTTP_201_CREATED
+        )
+
+
+class NewestAccountsView(ReplicaReadsMixin, generics.ListAPIView):
     queryset = Account.objects.all()
     serializer_class = AccountSerializer
+    pagination_class = NewestAccountsPagination
 
-    def get_queryset(self):
-        max_accounts = self.kwargs["num"]
-        return self.queryset.order_by("-date_joined")[0:max_accounts]
+    def list(self, request, *args, **kwargs):
+        # The pagination hands out rows that are serialized already.
+        page = self.paginate_queryset(self.get_queryset())
+        return self.get_paginated_response(page)
+
+
+class ListAccountsByGivenNum(ReplicaReadsMixin, generics.ListAPIView):
+    queryset = Account.objects.all()
+    serializer_class = AccountSerializer
+    max_accounts = getattr(settings, "ACCOUNTS_NEWEST_MAX_PAGE_SIZE", 100)
+
+    def list(self, request, *args, **kwargs):
+        num = min(self.kwargs["num"], self.max_accounts)
+
+        if num <= newest_accounts.maxlen:
+            return Response([data for _, _, data in newest_accounts.get(num)])
+
+        queryset = self.get_queryset().order_by("-date_joined", "-pk")
+        serializer = self.get_serializer(queryset[:num], many=True)
+        return Response(serializer.data)
 
 
 class UpdateAccountView(generics.UpdateAPIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [AccountOwner]
 
     queryset = Account.objects.all()
@@ -60,7 +127,7 @@ class UpdateAccountView(generics.UpdateAPIView):
 
 
 class ToggleIsActiveView(generics.UpdateAPIView):
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [UpdateIsActive]
 
     queryset = Account.objects.all()
@@ -98,6 +165,8 @@ class ToggleIsActiveView(generics.UpdateAPIView):
 
 
 class LoginView(views.APIView):
+    throttle_classes = [LoginRateThrottle, LoginAddressRateThrottle]
+
     def post(self, request):
 
         serializer = LoginSerializer(data=request.data)
@@ -109,7 +178,13 @@ class LoginView(views.APIView):
         )
 
         if user:
-            token, _ = Token.objects.get_or_create(user=user)
+            try:
+                token = user.auth_token
+            except Token.DoesNotExist:
+                token, _ = Token.objects.get_or_create(user=user)
+                # The new token must authenticate the next request even if
+                # the replicas haven't seen it yet.
+                pin_to_primary(user)
             return Response({"token": token.key})
 
         return Response(
@@ -0,0 +1,10 @@
+import os
+
+import django
+
+
+def setup():
+    os.environ.setdefault(
+        "DJANGO_SETTINGS_MODULE", "komercio_base_project.settings"
+    )
+    django.setup()
@@ -0,0 +1,272 @@
+"""
+Latency, throughput and queries per request of the Komercio API routes.
+
+    python -m benchmarks.api --accounts 1000 --products 100000
+    python -m benchmarks.api --driver wsgi --concurrency 8
+
+The `client` driver calls the routes in-process through the Django test
+client and also counts SQL queries. The `wsgi` driver serves the project on
+a local threaded WSGI server and hits it over HTTP from `--concurrency`
+threads. Both run against a throwaway database seeded with `--seed`.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks import setup
+
+setup()
+
+from accounts.models import Account  # noqa: E402
+from django.core.servers.basehttp import (  # noqa: E402
+    ThreadedWSGIServer,
+    WSGIRequestHandler,
+)
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    CaptureQueriesContext,
+    override_settings,
+)
+from products.models import Product  # noqa: E402
+from rest_framework.authtoken.models import Token  # noqa: E402
+
+from benchmarks.fixtures import seed, test_database  # noqa: E402
+from benchmarks.stats import dump, print_table, summarize  # noqa: E402
+
+DUMMY_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+}
+
+
+def get_scenarios():
+    seller = Account.objects.create_user(
+        email="bench@bench.com",
+        password="bench",
+        first_name="Bench",
+        last_name="Seller",
+        is_seller=True,
+    )
+    token = Token.objects.create(user=seller)
+    product_id = Product.objects.values_list("pk", flat=True).first()
+    seller_id = Product.objects.values_list("seller_id", flat=True).first()
+
+    credentials = {"email": "bench@bench.com", "password": "bench"}
+    product = {"description": "bench product", "price": 9.9, "quantity": 5}
+
+    return {
+        "login": ("POST", "/api/login/", credentials, None),
+        "products page": ("GET", "/api/products/?page_size=20", None, None),
+        "products seller filter": (
+            "GET",
+            f"/api/products/?seller_id={seller_id}&is_active=true"
+            "&page_size=20",
+            None,
+            None,
+        ),
+        "product detail": ("GET", f"/api/products/{product_id}/", None, None),
+        "products search": (
+            "GET",
+            "/api/products/search/?q=product",
+            None,
+            None,
+        ),
+        "newest accounts": ("GET", "/api/accounts/newest/20/", None, None),
+        "newest accounts feed": (
+            "GET",
+            "/api/accounts/newest/?page_size=20",
+            None,
+            None,
+        ),
+        "seller inventory": (
+            "GET",
+            "/api/products/inventory/",
+            None,
+            token.key,
+        ),
+        "create product": ("POST", "/api/products/", product, token.key),
+    }
+
+
+class ClientDriver:
+    def __init__(self):
+        self.client = Client()
+
+    def request(self, method, path, body, token):
+        headers = {}
+        if token:
+            headers["HTTP_AUTHORIZATION"] = "Token " + token
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.generic(
+                method,
+                path,
+                json.dumps(body) if body is not None else "",
+                content_type="application/json",
+                **headers,
+            )
+
+        assert response.status_code < 400, (path, response.status_code)
+        return len(context.captured_queries)
+
+    def run(self, scenario, requests, concurrency):
+        timings = []
+        queries = []
+
+        started = time.perf_counter()
+        for _ in range(requests):
+            start = time.perf_counter()
+            queries.append(self.request(*scenario))
+            timings.append((time.perf_counter() - start) * 1000)
+
+        return summarize(timings, time.perf_counter() - started, queries)
+
+    def close(self): ...
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args): ...
+
+
+class WSGIDriver:
+    def __init__(self):
+        self.server = ThreadedWSGIServer(("127.0.0.1", 0), QuietHandler)
+        self.server.set_app(get_wsgi_application())
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True
+        )
+        self.thread.start()
+
+    def request(self, method, path, body, token):
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = "Token " + token
+
+        host, port = self.server.server_address
+        conn = http.client.HTTPConnection(host, port)
+        conn.request(
+            method,
+            path,
+            json.dumps(body) if body is not None else None,
+            headers,
+        )
+        response = conn.getresponse()
+        response.read()
+        conn.close()
+
+        assert response.status < 400, (path, response.status)
+
+    def run(self, scenario, requests, concurrency):
+        timings = []
+        errors = []
+        lock = threading.Lock()
+
+        def worker(count):
+            local = []
+            try:
+                for _ in range(count):
+                    start = time.perf_counter()
+                    self.request(*scenario)
+                    local.append((time.perf_counter() - start) * 1000)
+            except Exception as err:
+                errors.append(err)
+            with lock:
+                timings.extend(local)
+
+        counts = [requests // concurrency] * concurrency
+        for index in range(requests % concurrency):
+            counts[index] += 1
+
+        threads = [
+            threading.Thread(target=worker, args=(count,)) for count in counts
+        ]
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            raise errors[0]
+
+        return summarize(timings, time.perf_counter() - started)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+DRIVERS = {"client": ClientDriver, "wsgi": WSGIDriver}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--driver", choices=DRIVERS, default="client")
+    parser.add_argument("--scenario", action="append")
+    parser.add_argument(
+        "--response-cache",
+        action="store_true",
+        help="keep the product response cache enabled",
+    )
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    database = None
+    # The login scenario repeats one login far past any sane rate.
+    overrides = {
+        "LOGIN_THROTTLE_RATE": None,
+        "LOGIN_ADDRESS_THROTTLE_RATE": None,
+    }
+    if args.driver == "wsgi":
+        database = os.path.join(tempfile.mkdtemp(), "benchmark.sqlite3")
+        overrides["ALLOWED_HOSTS"] = ["127.0.0.1", "testserver"]
+    if args.response_cache:
+        # One process, the local cache sees every invalidation.
+        overrides["RESPONSE_CACHE_ALIAS"] = "default"
+    else:
+        overrides["CACHES"] = DUMMY_CACHES
+
+    results = {}
+    with test_database(database), override_settings(**overrides):
+        seed(args.accounts, args.products, args.seed)
+        scenarios = get_scenarios()
+        driver = DRIVERS[args.driver]()
+
+        try:
+            for name in args.scenario or scenarios:
+                scenario = scenarios[name]
+                driver.run(scenario, args.warmup, args.concurrency)
+                results[name] = driver.run(
+                    scenario, args.requests, args.concurrency
+                )
+        finally:
+            driver.close()
+
+    print(
+        f"{args.driver} driver, {args.accounts} accounts, "
+        f"{args.products} products\n"
+    )
+    print_table(results)
+
+    if args.json:
+        dump(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Latency and throughput of the API routes under different database profiles:
+connections closed after every request against persistent ones
+(CONN_MAX_AGE), and SQLite's rollback journal against WAL plus the
+SQLITE_PRAGMAS from settings.
+
+    python -m benchmarks.database --products 100000 --concurrency 8
+
+Requests go straight into the WSGI application from `--concurrency` worker
+threads, the way a threaded app server runs them, so each worker keeps its
+own connection between requests when CONN_MAX_AGE allows it. Needs the
+utils.sqlite3 backend (the default DB_ENGINE).
+"""
+
+import argparse
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from wsgiref.util import setup_testing_defaults
+
+from benchmarks import setup
+
+setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.db.backends.signals import connection_created  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+
+from benchmarks.api import DUMMY_CACHES, get_scenarios  # noqa: E402
+from benchmarks.fixtures import seed, test_database  # noqa: E402
+from benchmarks.stats import dump, print_table, summarize  # noqa: E402
+
+# WAL sticks to the database file, so the rollback journal profiles run
+# first and switch it back explicitly. Every profile keeps the timeout and
+# IMMEDIATE transactions of the settings OPTIONS, concurrent writers wait
+# for the lock instead of failing with "database is locked".
+PROFILES = {
+    "journal, no reuse": (0, {"journal_mode": "DELETE"}),
+    "journal, persistent": (60, {"journal_mode": "DELETE"}),
+    "wal + pragmas, persistent": (60, settings.SQLITE_PRAGMAS),
+}
+
+SCENARIOS = ["products page", "product detail", "create product"]
+
+
+class WorkerDriver:
+    def __init__(self):
+        self.application = get_wsgi_application()
+        self.connections_opened = 0
+        self.lock = threading.Lock()
+        connection_created.connect(self.count_connection)
+
+    def count_connection(self, sender, **kwargs):
+        with self.lock:
+            self.connections_opened += 1
+
+    def request(self, method, path, body, token):
+        code = self.call(method, path, body, token)
+        assert code < 400, (path, code)
+
+    def call(self, method, path, body, token):
+        return self.fetch(method, path, body, token)[0]
+
+    def fetch(self, method, path, body, token):
+        path, _, query = path.partition("?")
+        payload = json.dumps(body).encode() if body is not None else b""
+        environ = {
+            "REQUEST_METHOD": method,
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(payload)),
+            "wsgi.input": io.BytesIO(payload),
+        }
+        if token:
+            environ["HTTP_AUTHORIZATION"] = "Token " + token
+        setup_testing_defaults(environ)
+
+        status = []
+        response = self.application(
+            environ, lambda code, headers: status.append(code)
+        )
+        try:
+            content = b"".join(response)
+        finally:
+            # Fires request_finished, which closes connections older than
+            # CONN_MAX_AGE.
+            response.close()
+
+        return int(status[0].split()[0]), content
+
+    def run(self, scenario, requests, concurrency):
+        timings = []
+        errors = []
+
+        def worker(count):
+            local = []
+            try:
+                for _ in range(count):
+                    start = time.perf_counter()
+                    self.request(*scenario)
+                    local.append((time.perf_counter() - start) * 1000)
+            except Exception as err:
+                errors.append(err)
+            finally:
+                connections.close_all()
+            with self.lock:
+                timings.extend(local)
+
+        counts = [requests // concurrency] * concurrency
+        for index in range(requests % concurrency):
+            counts[index] += 1
+
+        threads = [
+            threading.Thread(target=worker, args=(count,)) for count in counts
+        ]
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            raise errors[0]
+
+        return summarize(timings, time.perf_counter() - started)
+
+
+def use_profile(conn_max_age, pragmas):
+    # Worker threads build their connections from this same settings dict.
+    options = connection.settings_dict["OPTIONS"]
+    connection.settings_dict["CONN_MAX_AGE"] = conn_max_age
+    options["pragmas"] = pragmas
+    options.setdefault("timeout", 20)
+    options.setdefault("transaction_mode", "IMMEDIATE")
+    connections.close_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scenario", action="append")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    if settings.DATABASES["default"]["ENGINE"] != "utils.sqlite3":
+        parser.error("run with DB_ENGINE=utils.sqlite3")
+
+    database = os.path.join(tempfile.mkdtemp(), "benchmark.sqlite3")
+    overrides = {
+        "ALLOWED_HOSTS": ["127.0.0.1", "testserver"],
+        "CACHES": DUMMY_CACHES,
+        "SLOW_QUERY_THRESHOLD_MS": None,
+    }
+
+    results = {}
+    with test_database(database), override_settings(**overrides):
+        seed(args.accounts, args.products, args.seed)
+        scenarios = get_scenarios()
+        driver = WorkerDriver()
+
+        for profile, (conn_max_age, pragmas) in PROFILES.items():
+            use_profile(conn_max_age, pragmas)
+            driver.connections_opened = 0
+
+            results[profile] = {}
+            for name in args.scenario or SCENARIOS:
+                scenario = scenarios[name]
+                driver.run(scenario, args.warmup, args.concurrency)
+                results[profile][name] = driver.run(
+                    scenario, args.requests, args.concurrency
+                )
+            results[profile]["connections opened"] = driver.connections_opened
+
+    print(
+        f"{args.accounts} accounts, {args.products} products, "
+        f"{args.concurrency} workers\n"
+    )
+    for profile, rows in results.items():
+        opened = rows.pop("connections opened")
+        print(f"== {profile} ({opened} connections opened)")
+        print_table(rows)
+        print()
+        rows["connections opened"] = opened
+
+    if args.json:
+        dump(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
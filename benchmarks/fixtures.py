@@ -0,0 +1,27 @@
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from products import seeding
+
+
+@contextmanager
+def test_database(name=None):
+    # A named SQLite file is needed when the database is shared with a
+    # server thread, the default in-memory one is per connection.
+    if name is not None:
+        connection.settings_dict["TEST"]["NAME"] = name
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def seed(accounts, products, seed_value):
+    return seeding.seed(accounts, products, seed_value, now=timezone.now())
@@ -0,0 +1,118 @@
+"""
+Query plans and latency of the hot Product/Account queries with and without
+the indexes added in accounts 0003 and products 0002.
+
+    python -m benchmarks.indexes --accounts 10000 --products 1000000
+
+Runs against a throwaway test database, never against db.sqlite3.
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from benchmarks import setup
+
+setup()
+
+from accounts.models import Account  # noqa: E402
+from django.db import connection  # noqa: E402
+from products.models import Product  # noqa: E402
+
+from benchmarks.fixtures import seed, test_database  # noqa: E402
+
+
+def get_queries(seller_ids, rng):
+    return {
+        "seller active products": lambda: list(
+            Product.objects.filter(
+                seller_id=rng.choice(seller_ids), is_active=True
+            )
+        ),
+        "active price range": lambda: list(
+            Product.objects.filter(
+                is_active=True, price__gte=100, price__lte=110
+            ).order_by("price")[:20]
+        ),
+        "newest accounts": lambda: list(
+            Account.objects.order_by("-date_joined")[:20]
+        ),
+    }
+
+
+def get_plans():
+    return {
+        "seller active products": Product.objects.filter(
+            seller_id=1, is_active=True
+        ).explain(),
+        "active price range": Product.objects.filter(
+            is_active=True, price__gte=100, price__lte=110
+        )
+        .order_by("price")[:20]
+        .explain(),
+        "newest accounts": Account.objects.order_by("-date_joined")[
+            :20
+        ].explain(),
+    }
+
+
+def measure(queries, repeat):
+    results = {}
+    for name, query in queries.items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            query()
+            timings.append((time.perf_counter() - start) * 1000)
+        results[name] = statistics.median(timings)
+
+    return results
+
+
+def drop_indexes():
+    with connection.schema_editor() as schema_editor:
+        for model in (Account, Product):
+            for index in model._meta.indexes:
+                schema_editor.remove_index(model, index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--accounts", type=int, default=10000)
+    parser.add_argument("--products", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with test_database():
+        started = time.perf_counter()
+        seller_ids = seed(args.accounts, args.products, args.seed)
+        print(
+            f"seeded {args.accounts} accounts and {args.products} products "
+            f"in {time.perf_counter() - started:.1f}s\n"
+        )
+
+        rng = random.Random(args.seed)
+        indexed_plans = get_plans()
+        indexed = measure(get_queries(seller_ids, rng), args.repeat)
+
+        drop_indexes()
+
+        rng = random.Random(args.seed)
+        plain_plans = get_plans()
+        plain = measure(get_queries(seller_ids, rng), args.repeat)
+
+    for name in indexed:
+        print(f"== {name}")
+        for label, timing, plan in (
+            ("without indexes", plain[name], plain_plans[name]),
+            ("with indexes", indexed[name], indexed_plans[name]),
+        ):
+            print(f"   {label + ':':17} {timing:9.3f} ms")
+            for line in plan.splitlines():
+                print(f"      {line}")
+
+
+if __name__ == "__main__":
+    main()
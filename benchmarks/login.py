@@ -0,0 +1,102 @@
+"""
+Logins per second on one core for different password hasher setups.
+
+    python -m benchmarks.login --logins 20
+    PASSWORD_HASH_ITERATIONS=100000 python -m benchmarks.login
+
+"before" is the previous login path: Django's ModelBackend plus a separate
+token query, hashing with Django's default PBKDF2 iteration count. The other
+rows use AccountTokenBackend with the hasher and iterations shown.
+"""
+
+import argparse
+import time
+
+from benchmarks import setup
+
+setup()
+
+from accounts.models import Account  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.hashers import PBKDF2PasswordHasher  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    CaptureQueriesContext,
+    override_settings,
+)
+from rest_framework.authtoken.models import Token  # noqa: E402
+
+from benchmarks.fixtures import test_database  # noqa: E402
+
+
+def get_setups(iterations):
+    setups = {
+        "before": {
+            "AUTHENTICATION_BACKENDS": [
+                "django.contrib.auth.backends.ModelBackend"
+            ],
+            "PASSWORD_HASH_ITERATIONS": PBKDF2PasswordHasher.iterations,
+        },
+    }
+    for count in iterations:
+        setups[f"pbkdf2 {count} iterations"] = {
+            "PASSWORD_HASH_ITERATIONS": count
+        }
+
+    return setups
+
+
+def run(name, overrides, logins):
+    email = f"{name.replace(' ', '-')}@bench.com"
+    credentials = {"email": email, "password": "bench-password"}
+
+    with override_settings(
+        LOGIN_THROTTLE_RATE=None, LOGIN_ADDRESS_THROTTLE_RATE=None, **overrides
+    ):
+        user = Account.objects.create_user(
+            first_name="Bench", last_name="User", is_seller=True, **credentials
+        )
+        Token.objects.create(user=user)
+
+        client = Client()
+        with CaptureQueriesContext(connection) as context:
+            client.post("/api/login/", data=credentials)
+        queries = len(context.captured_queries)
+
+        started = time.perf_counter()
+        for _ in range(logins):
+            response = client.post("/api/login/", data=credentials)
+            assert response.status_code == 200, response.content
+        elapsed = time.perf_counter() - started
+
+    return logins / elapsed, queries
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        action="append",
+        help="PBKDF2 iteration counts to compare, repeatable",
+    )
+    args = parser.parse_args()
+
+    iterations = args.iterations or sorted(
+        {settings.PASSWORD_HASH_ITERATIONS, 100000, 20000}, reverse=True
+    )
+
+    print(f"{'setup':32} {'logins/s':>9} {'queries':>8}")
+    with test_database():
+        for name, overrides in get_setups(iterations).items():
+            rate, queries = run(name, overrides, args.logins)
+            print(f"{name:32} {rate:9.1f} {queries:8d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Render and parse time of product list payloads with DRF's JSONRenderer and
+JSONParser against utils.renderers.FastJSONRenderer / FastJSONParser.
+
+    python -m benchmarks.renderers --rows 1000 --rows 10000 --rows 100000
+
+The fast pair only differs when orjson is installed.
+"""
+
+import argparse
+import io
+import random
+import time
+
+from benchmarks import setup
+
+setup()
+
+from rest_framework.parsers import JSONParser  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+from utils.parsers import FastJSONParser  # noqa: E402
+from utils.renderers import FastJSONRenderer, orjson  # noqa: E402
+
+
+def get_payload(rows, rng):
+    return [
+        {
+            "description": f"product {index}",
+            "price": round(rng.uniform(1, 1000), 2),
+            "quantity": rng.randrange(0, 500),
+            "is_active": rng.random() < 0.8,
+            "seller_id": rng.randrange(1, 1000),
+        }
+        for index in range(rows)
+    ]
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--rows", type=int, action="append")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"orjson: {'installed' if orjson else 'not installed'}\n")
+    print(
+        f"{'rows':>7} {'render ms':>10} {'fast ms':>9} "
+        f"{'parse ms':>9} {'fast ms':>9}"
+    )
+
+    for rows in args.rows or [1000, 10000, 100000]:
+        payload = get_payload(rows, rng)
+        body = JSONRenderer().render(payload)
+
+        render = best_of(args.repeat, lambda: JSONRenderer().render(payload))
+        fast_render = best_of(
+            args.repeat, lambda: FastJSONRenderer().render(payload)
+        )
+        parse = best_of(
+            args.repeat, lambda: JSONParser().parse(io.BytesIO(body))
+        )
+        fast_parse = best_of(
+            args.repeat, lambda: FastJSONParser().parse(io.BytesIO(body))
+        )
+
+        print(
+            f"{rows:7d} {render:10.2f} {fast_render:9.2f} "
+            f"{parse:9.2f} {fast_parse:9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
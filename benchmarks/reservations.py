@@ -0,0 +1,240 @@
+"""
+Throughput and correctness of concurrent orders against a few hot products:
+the old read-modify-write PATCH of Product.quantity against the atomic
+POST /api/products/reserve/ endpoint.
+
+    python -m benchmarks.reservations --orders 2000 --concurrency 8
+
+Every order takes `--units` units of `--batch` random hot products. Once
+all orders ran, the stock taken off the products is compared with the
+units of every write the API answered with a 2xx: with read-modify-write
+some accepted writes are lost, with the reserve endpoint none are and no
+product goes below zero. Writes SQLite refuses with "database is locked"
+were rolled back and are retried.
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+from benchmarks import setup
+
+setup()
+
+from accounts.models import Account  # noqa: E402
+from django.db import OperationalError, connections  # noqa: E402
+from django.db.models import Sum  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+from products.models import Product  # noqa: E402
+from rest_framework.authtoken.models import Token  # noqa: E402
+from rest_framework.status import is_success  # noqa: E402
+
+from benchmarks.api import DUMMY_CACHES  # noqa: E402
+from benchmarks.database import WorkerDriver  # noqa: E402
+from benchmarks.fixtures import seed, test_database  # noqa: E402
+from benchmarks.stats import dump, percentile  # noqa: E402
+
+RETRIES = 50
+
+
+def send(driver, method, path, body, token):
+    # SQLite answers "database is locked" instead of waiting when two
+    # transactions would deadlock upgrading their locks. The request was
+    # rolled back, it is sent again.
+    for attempt in range(RETRIES):
+        try:
+            return driver.fetch(method, path, body, token)
+        except OperationalError as err:
+            if "locked" not in str(err) or attempt == RETRIES - 1:
+                raise
+            time.sleep(random.uniform(0, 0.001 * 2 ** min(attempt, 8)))
+
+
+def patch_order(driver, token, items):
+    # What clients had to do before: read the stock, write it back lowered.
+    # Every PATCH commits on its own, the units of those that succeeded are
+    # taken even when a later one fails.
+    applied = 0
+    for product_id, units in items:
+        path = f"/api/products/{product_id}/"
+        code, content = send(driver, "GET", path, None, token)
+        if not is_success(code):
+            break
+        quantity = json.loads(content)["quantity"]
+        if quantity - units <= 0:
+            break
+        code, _ = send(
+            driver, "PATCH", path, {"quantity": quantity - units}, token
+        )
+        if not is_success(code):
+            break
+        applied += units
+    return applied
+
+
+def reserve_order(driver, token, items):
+    code, _ = send(
+        driver,
+        "POST",
+        "/api/products/reserve/",
+        [{"id": product_id, "quantity": units} for product_id, units in items],
+        token,
+    )
+    if not is_success(code):
+        return 0
+    return sum(units for _, units in items)
+
+
+STRATEGIES = {"patch": patch_order, "reserve": reserve_order}
+
+
+def run(driver, order, token, product_ids, args):
+    rng = random.Random(args.seed)
+    orders = [
+        [
+            (product_id, args.units)
+            for product_id in rng.sample(product_ids, args.batch)
+        ]
+        for _ in range(args.orders)
+    ]
+    timings = []
+    accepted = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker(chunk):
+        local = []
+        units = 0
+        try:
+            for items in chunk:
+                start = time.perf_counter()
+                units += order(driver, token, items)
+                local.append((time.perf_counter() - start) * 1000)
+        except Exception as err:
+            errors.append(err)
+        finally:
+            connections.close_all()
+        with lock:
+            timings.extend(local)
+            accepted.append(units)
+
+    threads = [
+        threading.Thread(
+            target=worker, args=(orders[index :: args.concurrency],)
+        )
+        for index in range(args.concurrency)
+    ]
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    if errors:
+        raise errors[0]
+
+    products = Product.objects.filter(pk__in=product_ids)
+    decremented = (
+        args.stock * len(product_ids)
+        - products.aggregate(total=Sum("quantity"))["total"]
+    )
+
+    return {
+        "orders": len(timings),
+        "orders_per_second": len(timings) / elapsed,
+        "p50": percentile(timings, 50),
+        "p95": percentile(timings, 95),
+        "accepted_units": sum(accepted),
+        "decremented_units": decremented,
+        "lost_updates": sum(accepted) - decremented,
+        "oversold_products": products.filter(quantity__lt=0).count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--hot-products", type=int, default=5)
+    parser.add_argument("--stock", type=int, default=10000)
+    parser.add_argument("--units", type=int, default=1)
+    parser.add_argument("--batch", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--strategy", action="append", choices=STRATEGIES)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    if args.batch > args.hot_products:
+        parser.error("--batch can't be larger than --hot-products")
+
+    database = os.path.join(tempfile.mkdtemp(), "benchmark.sqlite3")
+    overrides = {
+        "ALLOWED_HOSTS": ["127.0.0.1", "testserver"],
+        "CACHES": DUMMY_CACHES,
+        "RESPONSE_CACHE_ALIAS": None,
+        "SLOW_QUERY_THRESHOLD_MS": None,
+        # Lets send() see the OperationalError instead of a 500.
+        "DEBUG_PROPAGATE_EXCEPTIONS": True,
+    }
+
+    results = {}
+    with test_database(database), override_settings(**overrides):
+        seed(10, 1000, args.seed)
+        seller = Account.objects.create_user(
+            email="bench@bench.com",
+            password="bench",
+            first_name="Bench",
+            last_name="Seller",
+            is_seller=True,
+        )
+        token = Token.objects.create(user=seller).key
+        product_ids = [
+            Product.objects.create(
+                description=f"hot product {index}",
+                price=9.9,
+                quantity=args.stock,
+                seller=seller,
+            ).pk
+            for index in range(args.hot_products)
+        ]
+        driver = WorkerDriver()
+
+        for name in args.strategy or STRATEGIES:
+            Product.objects.filter(pk__in=product_ids).update(
+                quantity=args.stock
+            )
+            results[name] = run(
+                driver, STRATEGIES[name], token, product_ids, args
+            )
+
+    print(
+        f"{args.orders} orders of {args.batch} x {args.units} units, "
+        f"{args.hot_products} hot products, {args.concurrency} clients\n"
+    )
+    print(
+        f"{'strategy':10} {'orders/s':>9} {'p50 ms':>9} {'p95 ms':>9} "
+        f"{'accepted':>9} {'applied':>9} {'lost':>6} {'oversold':>9}"
+    )
+    for name, row in results.items():
+        print(
+            f"{name:10} {row['orders_per_second']:9.1f} {row['p50']:9.3f} "
+            f"{row['p95']:9.3f} {row['accepted_units']:9d} "
+            f"{row['decremented_units']:9d} {row['lost_updates']:6d} "
+            f"{row['oversold_products']:9d}"
+        )
+
+    if args.json:
+        dump(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Rows per second of ProductListSerializer against its .values() fast path.
+
+    python -m benchmarks.serializers --products 100000
+
+"fetch + serialize" includes the query, "serialize" only the conversion of
+already fetched rows.
+"""
+
+import argparse
+import time
+
+from benchmarks import setup
+
+setup()
+
+from products.models import Product  # noqa: E402
+from products.serializers import ProductListSerializer  # noqa: E402
+
+from benchmarks.fixtures import seed, test_database  # noqa: E402
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--accounts", type=int, default=100)
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with test_database():
+        seed(args.accounts, args.products, args.seed)
+
+        queryset = Product.objects.all()
+        instances = list(queryset)
+        rows = list(ProductListSerializer.values_queryset(queryset))
+
+        assert ProductListSerializer(
+            instances, many=True
+        ).data == ProductListSerializer.represent_values(rows)
+
+        results = {
+            "serializer fetch + serialize": timed(
+                lambda: ProductListSerializer(
+                    Product.objects.all(), many=True
+                ).data
+            ),
+            "fast path fetch + serialize": timed(
+                lambda: ProductListSerializer.represent_values(
+                    ProductListSerializer.values_queryset(
+                        Product.objects.all()
+                    )
+                )
+            ),
+            "serializer serialize": timed(
+                lambda: ProductListSerializer(instances, many=True).data
+            ),
+            "fast path serialize": timed(
+                lambda: ProductListSerializer.represent_values(rows)
+            ),
+        }
+
+    print(f"{'mode':30} {'seconds':>9} {'rows/s':>12}")
+    for name, elapsed in results.items():
+        print(f"{name:30} {elapsed:9.3f} {args.products / elapsed:12.0f}")
+
+
+if __name__ == "__main__":
+    main()
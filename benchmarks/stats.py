@@ -0,0 +1,42 @@
+import json
+import statistics
+
+
+def percentile(values, percent):
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def summarize(timings, elapsed, queries=None):
+    return {
+        "requests": len(timings),
+        "rps": len(timings) / elapsed if elapsed else 0.0,
+        "mean": statistics.fmean(timings) if timings else 0.0,
+        "p50": percentile(timings, 50),
+        "p95": percentile(timings, 95),
+        "p99": percentile(timings, 99),
+        "queries": statistics.fmean(queries) if queries else None,
+    }
+
+
+def print_table(results):
+    print(
+        f"{'scenario':28} {'requests':>8} {'rps':>9} {'p50 ms':>9} "
+        f"{'p95 ms':>9} {'p99 ms':>9} {'queries':>8}"
+    )
+    for name, row in results.items():
+        queries = "-" if row["queries"] is None else f"{row['queries']:.1f}"
+        print(
+            f"{name:28} {row['requests']:8d} {row['rps']:9.1f} "
+            f"{row['p50']:9.3f} {row['p95']:9.3f} {row['p99']:9.3f} "
+            f"{queries:>8}"
+        )
+
+
+def dump(results, path):
+    with open(path, "w") as output:
+        json.dump(results, output, indent=2, sort_keys=True)
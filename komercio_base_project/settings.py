@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -48,6 +49,8 @@ MY_APPS = ["accounts", "products"]
 INSTALLED_APPS = DJANGO_APPS + EXTERNAL_APPS + MY_APPS
 
 MIDDLEWARE = [
+    "utils.instrumentation.InstrumentationMiddleware",
+    "utils.routers.ReplicaReadsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -57,6 +60,19 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+REST_FRAMEWORK = {
+    # orjson is used for JSON when installed, stdlib json otherwise.
+    "DEFAULT_RENDERER_CLASSES": [
+        "utils.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "utils.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+}
+
 ROOT_URLCONF = "komercio_base_project.urls"
 
 TEMPLATES = [
@@ -81,13 +97,111 @@ WSGI_APPLICATION = "komercio_base_project.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.0/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# Everything is read from the environment, the defaults are the local SQLite
+# file. DB_ENGINE=django.db.backends.postgresql plus DB_NAME, DB_USER, ...
+# switch to PostgreSQL. Connections are kept open for DB_CONN_MAX_AGE
+# seconds, Django 4.0 has no pool of its own so put pgbouncer in front of
+# PostgreSQL when workers outnumber the connections it can take.
+
+DB_ENGINE = os.environ.get("DB_ENGINE", "utils.sqlite3")
+
+DB_CONN_MAX_AGE = int(os.environ.get("DB_CONN_MAX_AGE", 60))
+
+# Applied to every new SQLite connection by the utils.sqlite3 backend. WAL
+# lets readers run while a write is in progress. Atomic blocks BEGIN
+# IMMEDIATE so concurrent writers wait up to `timeout` for the lock instead
+# of failing with "database is locked".
+
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -20000,
+    "mmap_size": 134217728,
+    "temp_store": "MEMORY",
+}
+
+if DB_ENGINE in ("utils.sqlite3", "django.db.backends.sqlite3"):
+    DATABASES = {
+        "default": {
+            "ENGINE": DB_ENGINE,
+            "NAME": os.environ.get("DB_NAME", BASE_DIR / "db.sqlite3"),
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "OPTIONS": {"timeout": 20},
+        }
+    }
+    if DB_ENGINE == "utils.sqlite3":
+        DATABASES["default"]["OPTIONS"]["pragmas"] = SQLITE_PRAGMAS
+        DATABASES["default"]["OPTIONS"]["transaction_mode"] = "IMMEDIATE"
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": DB_ENGINE,
+            "NAME": os.environ.get("DB_NAME", "komercio"),
+            "USER": os.environ.get("DB_USER", ""),
+            "PASSWORD": os.environ.get("DB_PASSWORD", ""),
+            "HOST": os.environ.get("DB_HOST", ""),
+            "PORT": os.environ.get("DB_PORT", ""),
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+        }
+    }
+
+# Read replicas
+# Comma separated SQLite files, or hosts for the other engines, e.g.
+# DB_REPLICAS=replica.sqlite3 to try it locally with a copy of db.sqlite3.
+# Safe requests to views using utils.mixins.ReplicaReadsMixin read from a
+# random replica, anything else uses default. Users who wrote something read
+# from default for the next REPLICA_STICKY_SECONDS, see
+# REPLICA_PIN_CACHE_ALIAS.
+
+DATABASE_REPLICAS = []
+
+for index, replica in enumerate(
+    filter(None, os.environ.get("DB_REPLICAS", "").split(","))
+):
+    alias = f"replica_{index}"
+    location = "NAME" if "sqlite" in DB_ENGINE else "HOST"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        location: replica.strip(),
+        "TEST": {"MIRROR": "default"},
     }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["utils.routers.ReplicaRouter"]
+
+REPLICA_STICKY_SECONDS = 5
+
+
+# Caches
+# https://docs.djangoproject.com/en/4.0/ref/settings/#caches
+
+# "default" lives in each process. CACHE_BACKEND and CACHE_LOCATION add a
+# "shared" alias every worker sees, e.g.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache and
+# CACHE_LOCATION=redis://127.0.0.1:6379, or PyMemcacheCache and
+# 127.0.0.1:11211. State that has to agree across workers lives there.
+
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND")
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
 }
 
+if CACHE_BACKEND:
+    CACHES["shared"] = {
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    }
+
+SHARED_CACHE_ALIAS = "shared" if CACHE_BACKEND else None
+
+# Users who wrote are pinned to default on this alias, every worker has to
+# see the pins. Without one authenticated users always read from default.
+
+REPLICA_PIN_CACHE_ALIAS = (
+    os.environ.get("REPLICA_PIN_CACHE_ALIAS") or SHARED_CACHE_ALIAS
+)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
@@ -114,6 +228,40 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# PASSWORD_HASHER picks the hasher used for new hashes. The others stay
+# listed so existing hashes still verify and get rehashed on the next login.
+
+PASSWORD_HASH_ITERATIONS = int(
+    os.environ.get("PASSWORD_HASH_ITERATIONS", 320000)
+)
+
+PASSWORD_HASHER = os.environ.get("PASSWORD_HASHER", "pbkdf2")
+
+AVAILABLE_PASSWORD_HASHERS = {
+    "pbkdf2": "accounts.hashers.ConfigurablePBKDF2PasswordHasher",
+    "pbkdf2_sha1": "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "argon2": "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "bcrypt": "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "scrypt": "django.contrib.auth.hashers.ScryptPasswordHasher",
+}
+
+PASSWORD_HASHERS = [AVAILABLE_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    hasher
+    for name, hasher in AVAILABLE_PASSWORD_HASHERS.items()
+    if name != PASSWORD_HASHER
+]
+
+AUTHENTICATION_BACKENDS = ["accounts.backends.AccountTokenBackend"]
+
+# Attempts per email and client address, and per client address alone, on
+# POST /api/login/. Counted on SHARED_CACHE_ALIAS when there is one.
+
+LOGIN_THROTTLE_RATE = "10/min"
+
+LOGIN_ADDRESS_THROTTLE_RATE = "100/min"
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.0/topics/i18n/
 
@@ -137,3 +285,120 @@ STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTH_USER_MODEL = "accounts.Account"
+
+# Products listing
+# Page size limits for the keyset pagination of GET /api/products/
+
+PRODUCTS_PAGE_SIZE = 20
+
+PRODUCTS_MAX_PAGE_SIZE = 100
+
+# Build product list and export rows from .values() instead of running them
+# through ProductListSerializer fields. Same JSON, less CPU per row.
+
+PRODUCTS_FAST_SERIALIZATION = False
+
+
+# Bulk account provisioning
+# Upper bound of accounts per POST /api/accounts/bulk/ and rows per INSERT.
+
+ACCOUNTS_BULK_MAX_ITEMS = 10000
+
+ACCOUNTS_BULK_BATCH_SIZE = 500
+
+
+# Password hashing pool
+# Signups, password updates and bulk provisioning hash on
+# PASSWORD_HASH_WORKERS processes, None uses every core and 0 hashes on the
+# request thread. Past PASSWORD_HASH_MAX_PENDING hashes in flight, requests
+# wait PASSWORD_HASH_QUEUE_TIMEOUT seconds for a slot, then get a 503.
+
+PASSWORD_HASH_WORKERS = (
+    int(os.environ["PASSWORD_HASH_WORKERS"])
+    if "PASSWORD_HASH_WORKERS" in os.environ
+    else None
+)
+
+PASSWORD_HASH_MAX_PENDING = 64
+
+PASSWORD_HASH_QUEUE_TIMEOUT = 5
+
+
+# Newest accounts feed
+# Page size limits of GET /api/accounts/newest/. The latest
+# ACCOUNTS_NEWEST_BUFFER_SIZE signups are kept in memory and reloaded every
+# ACCOUNTS_NEWEST_BUFFER_TTL seconds to pick up other workers' signups.
+
+ACCOUNTS_NEWEST_PAGE_SIZE = 20
+
+ACCOUNTS_NEWEST_MAX_PAGE_SIZE = 100
+
+ACCOUNTS_NEWEST_BUFFER_SIZE = 100
+
+ACCOUNTS_NEWEST_BUFFER_TTL = 30
+
+
+# Token authentication cache
+# Token -> user lookups are kept in a per-process LRU for TTL seconds. Set
+# TOKEN_AUTH_CACHE_ALIAS to a CACHES alias to keep them there instead, a
+# revoked token then stops working on every worker at once.
+
+TOKEN_AUTH_CACHE_MAXSIZE = 1024
+
+TOKEN_AUTH_CACHE_TTL = 60
+
+TOKEN_AUTH_CACHE_ALIAS = None
+
+
+# Response cache
+# Rendered GET responses of the product views are cached on this CACHES alias
+# and invalidated whenever a Product is written. The invalidation has to
+# reach every worker, so it needs a shared backend and is off (None) without
+# one. RESPONSE_CACHE_ALIAS=default is only right for a single process.
+
+RESPONSE_CACHE_ALIAS = (
+    os.environ.get("RESPONSE_CACHE_ALIAS") or SHARED_CACHE_ALIAS
+)
+
+RESPONSE_CACHE_TIMEOUT = 300
+
+
+# Bulk product endpoints
+# Upper bound of items per request and rows per INSERT/UPDATE statement.
+
+PRODUCTS_BULK_MAX_ITEMS = 10000
+
+PRODUCTS_BULK_BATCH_SIZE = 500
+
+# Upper bound of items per POST /api/products/reserve/ batch.
+
+PRODUCTS_RESERVE_MAX_ITEMS = 100
+
+# Rows fetched and written per chunk by GET /api/products/export/.
+
+PRODUCTS_EXPORT_CHUNK_SIZE = 2000
+
+
+# Product search
+# Dotted path to a products.search backend. None picks SQLite FTS5 on SQLite
+# and a plain icontains lookup elsewhere.
+
+PRODUCTS_SEARCH_BACKEND = None
+
+# Deepest offset a search page can start at, every skipped match is still
+# ranked by the backend.
+
+PRODUCTS_SEARCH_MAX_OFFSET = 1000
+
+
+# Instrumentation
+# Queries slower than this are logged with the originating view. None turns
+# the log off.
+
+SLOW_QUERY_THRESHOLD_MS = 100
+
+
+# Async product reads
+# Size of the thread pool running ORM calls for the async product views.
+
+ASYNC_DB_THREADS = 8
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ProductsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'products'
+
+    def ready(self):
+        from products import signals
+
+        # Connects the query counter to connection_created before any
+        # connection is opened, whatever thread opens it.
+        from utils import instrumentation
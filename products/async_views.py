@@ -0,0 +1,102 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpResponse, HttpResponseNotAllowed
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.request import Request
+from utils.renderers import FastJSONRenderer
+
+from products.filters import ProductFilterBackend
+from products.models import Product
+from products.pagination import ProductKeysetPagination
+from products.serializers import ProductListSerializer
+
+# Django 4.0 has no async ORM yet, so the queries run on a bounded pool of
+# threads and the event loop never waits on the database.
+db_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, "ASYNC_DB_THREADS", 8),
+    thread_name_prefix="products-db",
+)
+
+
+def run_in_db_thread(func):
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(wrapper, thread_sensitive=False, executor=db_executor)
+
+
+def render(data, status=200):
+    return HttpResponse(
+        FastJSONRenderer().render(data),
+        content_type="application/json",
+        status=status,
+    )
+
+
+def render_error(err):
+    if isinstance(err.detail, (list, dict)):
+        return render(err.detail, err.status_code)
+
+    return render({"detail": err.detail}, err.status_code)
+
+
+@run_in_db_thread
+def list_products(request):
+    request = Request(request)
+    queryset = ProductFilterBackend().filter_queryset(
+        request, Product.objects.all(), None
+    )
+
+    paginator = ProductKeysetPagination()
+    page = paginator.paginate_queryset(queryset, request)
+    if page is None:
+        return ProductListSerializer(queryset, many=True).data
+
+    return {
+        "next": paginator.get_next_link(),
+        "results": ProductListSerializer(page, many=True).data,
+    }
+
+
+@run_in_db_thread
+def retrieve_product(pk):
+    product = Product.objects.filter(pk=pk).first()
+    if product is None:
+        raise NotFound()
+
+    return ProductListSerializer(product).data
+
+
+async def products_view(request):
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+
+    try:
+        data = await list_products(request)
+    except APIException as err:
+        return render_error(err)
+
+    return render(data)
+
+
+async def products_details_view(request, pk):
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+
+    try:
+        data = await retrieve_product(pk)
+    except APIException as err:
+        return render_error(err)
+
+    return render(data)
+
+
+products_view.replica_reads = True
+products_details_view.replica_reads = True
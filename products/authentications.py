@@ -1,9 +1,101 @@
-# from rest_framework.authentication import BaseAuthentication
-# from rest_framework.permissions import SAFE_METHODS
+import copy
+import threading
+import time
+from collections import OrderedDict
 
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
 
-# class IsAuthenticatedOrReadOnly(BaseAuthentication):
-#     def authenticate(self, request):
-#         if request.method in SAFE_METHODS:
-#             return True
-#     return
+
+class TokenCache:
+    """
+    Token key -> user lookups kept in a per-process LRU with TTL, or in a
+    shared Django cache when `alias` is set. The shared cache replaces the
+    LRU rather than backing it, a delete has to reach every worker.
+    """
+
+    key_prefix = "auth-token:"
+
+    def __init__(self, maxsize, ttl, alias=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.alias = alias
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        if self.alias is None:
+            return None
+        return caches[self.alias]
+
+    def get(self, key):
+        if self.shared is not None:
+            return self.shared.get(self.key_prefix + key)
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, user = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                return user
+            del self._entries[key]
+
+    def set(self, key, user):
+        if self.shared is not None:
+            self.shared.set(self.key_prefix + key, user, self.ttl)
+        else:
+            self._store(key, user, time.monotonic())
+
+    def delete(self, key):
+        if self.shared is not None:
+            self.shared.delete(self.key_prefix + key)
+        else:
+            with self._lock:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _store(self, key, user, now):
+        with self._lock:
+            self._entries[key] = (now + self.ttl, user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+token_cache = TokenCache(
+    maxsize=getattr(settings, "TOKEN_AUTH_CACHE_MAXSIZE", 1024),
+    ttl=getattr(settings, "TOKEN_AUTH_CACHE_TTL", 60),
+    alias=getattr(settings, "TOKEN_AUTH_CACHE_ALIAS", None),
+)
+
+
+def invalidate_user_tokens(user_id):
+    for key in Token.objects.filter(user_id=user_id).values_list(
+        "key", flat=True
+    ):
+        token_cache.delete(key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        user = token_cache.get(key)
+
+        if user is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, user)
+            return (user, token)
+
+        # Hand out a copy so a request mutating request.user can't leak into
+        # the cached instance shared with other requests.
+        user = copy.copy(user)
+        return (user, Token(key=key, user=user))
@@ -0,0 +1,4 @@
+class InsufficientStockError(Exception):
+    def __init__(self, product_ids):
+        super().__init__(f"Not enough stock for products {product_ids}")
+        self.product_ids = product_ids
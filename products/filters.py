@@ -0,0 +1,38 @@
+from rest_framework.filters import BaseFilterBackend
+
+from products.serializers import ProductFilterSerializer
+
+
+class ProductFilterBackend(BaseFilterBackend):
+    def filter_queryset(self, request, queryset, view):
+        serializer = ProductFilterSerializer(data=request.query_params.dict())
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        if "seller_id" in params:
+            queryset = queryset.filter(seller_id=params["seller_id"])
+
+        if "is_active" in params:
+            queryset = queryset.filter(is_active=params["is_active"])
+
+        if "min_price" in params:
+            queryset = queryset.filter(price__gte=params["min_price"])
+
+        if "max_price" in params:
+            queryset = queryset.filter(price__lte=params["max_price"])
+
+        if "in_stock" in params:
+            if params["in_stock"]:
+                queryset = queryset.filter(quantity__gt=0)
+            else:
+                queryset = queryset.filter(quantity__lte=0)
+
+        if "min_quantity" in params:
+            queryset = queryset.filter(quantity__gte=params["min_quantity"])
+
+        if "ordering" in params:
+            ordering = params["ordering"]
+            direction = "-" if ordering.startswith("-") else ""
+            queryset = queryset.order_by(ordering, direction + "pk")
+
+        return queryset
@@ -0,0 +1,152 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, FloatField, Q, Sum
+from django.db.models.functions import Coalesce
+
+from products.exceptions import InsufficientStockError
+from products.models import Product, SellerInventory
+
+STATE_FIELDS = ("seller_id", "price", "quantity", "is_active")
+TOTAL_FIELDS = (
+    "product_count",
+    "active_count",
+    "total_quantity",
+    "stock_value",
+)
+
+
+def get_state(product):
+    return {field: getattr(product, field) for field in STATE_FIELDS}
+
+
+def get_loaded_state(product):
+    loaded = getattr(product, "_loaded_values", {})
+    if all(field in loaded for field in STATE_FIELDS):
+        return {field: loaded[field] for field in STATE_FIELDS}
+    return None
+
+
+def lock_state(product, using=None):
+    """
+    The product's row as it is in the database, locked until the end of the
+    transaction. The instance may be stale, its own values can't be trusted
+    to know what a write replaces.
+    """
+    products = Product.objects.using(using)
+    if transaction.get_connection(using).in_atomic_block:
+        products = products.select_for_update()
+
+    return products.filter(pk=product.pk).values(*STATE_FIELDS).first()
+
+
+class InventoryDelta:
+    """
+    Collects the changes to the per-seller totals caused by a batch of
+    Product writes and applies them with one UPDATE per seller.
+    """
+
+    def __init__(self):
+        self.sellers = defaultdict(lambda: [0, 0, 0, 0.0])
+
+    def add(self, state, sign=1):
+        totals = self.sellers[state["seller_id"]]
+        totals[0] += sign
+        totals[1] += sign * int(state["is_active"])
+        totals[2] += sign * state["quantity"]
+        totals[3] += sign * state["price"] * state["quantity"]
+
+    def remove(self, state):
+        self.add(state, -1)
+
+    def change(self, old, new):
+        self.remove(old)
+        self.add(new)
+
+    def add_quantity(self, seller_id, price, quantity):
+        totals = self.sellers[seller_id]
+        totals[2] += quantity
+        totals[3] += price * quantity
+
+    def apply(self):
+        for seller_id, totals in self.sellers.items():
+            if any(totals):
+                apply_totals(seller_id, dict(zip(TOTAL_FIELDS, totals)))
+        self.sellers.clear()
+
+
+def apply_totals(seller_id, totals):
+    changes = {field: F(field) + value for field, value in totals.items()}
+    if SellerInventory.objects.filter(seller_id=seller_id).update(**changes):
+        return
+
+    # First product of the seller. Another request may create the row
+    # between the UPDATE and the INSERT, retry the UPDATE if so.
+    try:
+        with transaction.atomic():
+            SellerInventory.objects.create(seller_id=seller_id, **totals)
+    except IntegrityError:
+        SellerInventory.objects.filter(seller_id=seller_id).update(**changes)
+
+
+def reserve(quantities):
+    """
+    Takes `quantities` (product id -> units) off the stock of active
+    products, all or nothing. Each row is decremented by a conditional
+    UPDATE, so concurrent reservations can't oversell or overwrite each
+    other. Raises InsufficientStockError with every product that couldn't
+    be reserved.
+    """
+    failed = []
+
+    with transaction.atomic():
+        # Same lock order in every transaction, no deadlocks between
+        # overlapping batches.
+        for product_id in sorted(quantities):
+            amount = quantities[product_id]
+            reserved = Product.objects.filter(
+                pk=product_id, is_active=True, quantity__gte=amount
+            ).update(quantity=F("quantity") - amount)
+            if not reserved:
+                failed.append(product_id)
+
+        if failed:
+            raise InsufficientStockError(failed)
+
+        # The rows are locked by the UPDATEs above, seller and price can't
+        # change under us.
+        delta = InventoryDelta()
+        for product_id, seller_id, price in Product.objects.filter(
+            pk__in=quantities
+        ).values_list("pk", "seller_id", "price"):
+            delta.add_quantity(seller_id, price, -quantities[product_id])
+        delta.apply()
+
+
+def rebuild(seller_ids=None):
+    """
+    Recomputes the totals from the products table, for sellers whose rows
+    drifted (writes that bypassed the ORM, ...).
+    """
+    products = Product.objects.all()
+    if seller_ids is not None:
+        products = products.filter(seller_id__in=seller_ids)
+
+    rows = products.values("seller_id").annotate(
+        product_count=Count("id"),
+        active_count=Count("id", filter=Q(is_active=True)),
+        total_quantity=Coalesce(Sum("quantity"), 0),
+        stock_value=Coalesce(
+            Sum(F("price") * F("quantity"), output_field=FloatField()), 0.0
+        ),
+    )
+
+    with transaction.atomic():
+        inventories = SellerInventory.objects.all()
+        if seller_ids is not None:
+            inventories = inventories.filter(seller_id__in=seller_ids)
+        inventories.delete()
+
+        SellerInventory.objects.bulk_create(
+            SellerInventory(**row) for row in rows
+        )
@@ -0,0 +1,95 @@
+import time
+
+from accounts.models import Account
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+
+from products import seeding
+
+
+class Command(BaseCommand):
+    help = (
+        "Fills the database with generated accounts and products, the same "
+        "--seed on an empty database always gives the same rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--accounts", type=int, default=1000)
+        parser.add_argument("--products", type=int, default=10000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--password",
+            help="hashed once and shared by every account, "
+            "without it the accounts can't log in",
+        )
+        parser.add_argument(
+            "--sellers",
+            type=float,
+            default=1.0,
+            help="fraction of the accounts that are sellers",
+        )
+        parser.add_argument(
+            "--start",
+            type=int,
+            default=0,
+            help="number of the first account email, to add to a seeded "
+            "database",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=seeding.BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        if options["accounts"] < 0 or options["products"] < 0:
+            raise CommandError("--accounts and --products can't be negative.")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive.")
+        if not 0 <= options["sellers"] <= 1:
+            raise CommandError("--sellers must be between 0 and 1.")
+
+        start = options["start"]
+        emails = [
+            seeding.seed_email(start),
+            seeding.seed_email(start + options["accounts"] - 1),
+        ]
+        if (
+            options["accounts"]
+            and Account.objects.filter(email__in=emails).exists()
+        ):
+            raise CommandError(
+                "Seeded accounts already exist, pass a higher --start."
+            )
+
+        # One hash for every account, running the KDF per row is what
+        # makes creating accounts one by one take hours.
+        password = options["password"]
+        password = "!" if password is None else make_password(password)
+
+        started = time.perf_counter()
+        seller_ids = seeding.seed(
+            options["accounts"],
+            options["products"],
+            options["seed"],
+            password=password,
+            seller_ratio=options["sellers"],
+            start=start,
+            batch_size=options["batch_size"],
+            progress=self.progress if options["verbosity"] > 1 else None,
+        )
+
+        products = options["products"] if seller_ids else 0
+        if options["products"] and not seller_ids:
+            self.stderr.write(
+                self.style.WARNING("No seeded sellers to own the products.")
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {options['accounts']} accounts and "
+                f"{products} products in "
+                f"{time.perf_counter() - started:.1f}s."
+            )
+        )
+
+    def progress(self, model, total):
+        self.stdout.write(f"{model._meta.verbose_name_plural}: {total}")
@@ -0,0 +1,70 @@
+from django.db import migrations
+
+FORWARD_SQL = [
+    """
+    CREATE VIRTUAL TABLE products_product_fts USING fts5(
+        description, content='products_product', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER products_product_fts_insert
+    AFTER INSERT ON products_product BEGIN
+        INSERT INTO products_product_fts(rowid, description)
+        VALUES (new.id, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER products_product_fts_delete
+    AFTER DELETE ON products_product BEGIN
+        INSERT INTO products_product_fts(
+            products_product_fts, rowid, description
+        )
+        VALUES ('delete', old.id, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER products_product_fts_update
+    AFTER UPDATE OF description ON products_product BEGIN
+        INSERT INTO products_product_fts(
+            products_product_fts, rowid, description
+        )
+        VALUES ('delete', old.id, old.description);
+        INSERT INTO products_product_fts(rowid, description)
+        VALUES (new.id, new.description);
+    END
+    """,
+    """
+    INSERT INTO products_product_fts(products_product_fts) VALUES ('rebuild')
+    """,
+]
+
+REVERSE_SQL = [
+    "DROP TRIGGER IF EXISTS products_product_fts_insert",
+    "DROP TRIGGER IF EXISTS products_product_fts_delete",
+    "DROP TRIGGER IF EXISTS products_product_fts_update",
+    "DROP TABLE IF EXISTS products_product_fts",
+]
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != "sqlite":
+            return
+
+        for statement in statements:
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0002_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_sqlite(FORWARD_SQL), run_on_sqlite(REVERSE_SQL)
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.0.5 on 2026-10-18 10:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, F, FloatField, Q, Sum
+
+
+def backfill(apps, schema_editor):
+    Product = apps.get_model("products", "Product")
+    SellerInventory = apps.get_model("products", "SellerInventory")
+
+    rows = Product.objects.values("seller_id").annotate(
+        product_count=Count("id"),
+        active_count=Count("id", filter=Q(is_active=True)),
+        total_quantity=Sum("quantity"),
+        stock_value=Sum(F("price") * F("quantity"), output_field=FloatField()),
+    )
+    SellerInventory.objects.bulk_create(
+        (SellerInventory(**row) for row in rows), batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_indexes'),
+        ('products', '0003_product_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SellerInventory',
+            fields=[
+                ('seller', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='inventory', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('product_count', models.IntegerField(default=0)),
+                ('active_count', models.IntegerField(default=0)),
+                ('total_quantity', models.BigIntegerField(default=0)),
+                ('stock_value', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,10 @@
-from django.db import models
+from django.db import models, transaction
+
+
+class ProductQuerySet(models.QuerySet):
+    def owned_by(self, user):
+        # Compares the foreign key column, the seller row is never loaded.
+        return self.filter(seller_id=user.id)
 
 
 class Product(models.Model):
@@ -12,3 +18,41 @@ class Product(models.Model):
         on_delete=models.DO_NOTHING,
         related_name="products",
     )
+
+    objects = ProductQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["seller", "is_active"],
+                name="product_seller_active_idx",
+            ),
+            models.Index(
+                fields=["is_active", "price"],
+                name="product_active_price_idx",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        # products.signals locks the row before the write and updates the
+        # seller totals after it, both have to be in the same transaction.
+        with transaction.atomic(using=kwargs.get("using"), savepoint=False):
+            super().save(*args, **kwargs)
+
+
+class SellerInventory(models.Model):
+    """
+    Running totals of a seller's products, kept up to date by
+    products.inventory on every Product write.
+    """
+
+    seller = models.OneToOneField(
+        "accounts.Account",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="inventory",
+    )
+    product_count = models.IntegerField(default=0)
+    active_count = models.IntegerField(default=0)
+    total_quantity = models.BigIntegerField(default=0)
+    stock_value = models.FloatField(default=0)
@@ -0,0 +1,205 @@
+import base64
+import json
+import math
+from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import Response
+
+from products.serializers import ProductFilterSerializer
+
+
+class ProductKeysetPagination(BasePagination):
+    """
+    Keyset pagination ordered on an optional sort field plus the primary key.
+
+    Each page is fetched with a `WHERE (field, pk) > (last_field, last_pk)`
+    style filter, so the cost stays O(page_size) however deep the client goes.
+    Pagination only kicks in when the client sends `cursor` or `page_size`,
+    otherwise the plain list is returned as before.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    ordering_query_param = "ordering"
+
+    page_size = getattr(settings, "PRODUCTS_PAGE_SIZE", 20)
+    max_page_size = getattr(settings, "PRODUCTS_MAX_PAGE_SIZE", 100)
+    ordering_fields = ProductFilterSerializer.ordering_fields
+
+    invalid_cursor_message = "Invalid cursor"
+    # Cursor integers have to fit the 64 bit columns they are compared to.
+    max_cursor_int = 2**63 - 1
+    invalid_ordering_message = "Invalid ordering"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if (
+            self.cursor_query_param not in params
+            and self.page_size_query_param not in params
+        ):
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.field, self.reverse = self.get_ordering(request)
+
+        cursor = self.decode_cursor(request, queryset.model)
+        direction = "-" if self.reverse else ""
+        order_by = [direction + "pk"]
+        if self.field:
+            order_by.insert(0, direction + self.field)
+
+        queryset = queryset.order_by(*order_by)
+        if cursor is not None:
+            queryset = queryset.filter(self.get_keyset_filter(cursor))
+
+        results = list(queryset[: self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[: self.page_size]
+
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        if page_size <= 0:
+            return self.page_size
+
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(self.ordering_query_param, "")
+        reverse = ordering.startswith("-")
+        field = ordering.lstrip("-")
+
+        if field in ("", "id", "pk"):
+            return None, reverse
+
+        if field not in self.ordering_fields:
+            raise NotFound(self.invalid_ordering_message)
+
+        return field, reverse
+
+    def get_keyset_filter(self, cursor):
+        lookup = "lt" if self.reverse else "gt"
+        pk_filter = Q(**{f"pk__{lookup}": cursor["pk"]})
+
+        if not self.field:
+            return pk_filter
+
+        value = cursor["value"]
+        return Q(**{f"{self.field}__{lookup}": value}) | (
+            Q(**{self.field: value}) & pk_filter
+        )
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            decoded = base64.urlsafe_b64decode(encoded.encode("ascii"))
+            cursor = json.loads(decoded.decode("utf-8"))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if (
+            not isinstance(cursor, dict)
+            or "pk" not in cursor
+            or (self.field and "value" not in cursor)
+            or cursor.get("field") != self.field
+            or cursor.get("reverse") != self.reverse
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+        # Cursors come back from clients, their values are checked like
+        # any other input before they reach the ORM.
+        cursor["pk"] = self.clean_cursor_value(model._meta.pk, cursor["pk"])
+        if self.field:
+            cursor["value"] = self.clean_cursor_value(
+                model._meta.get_field(self.field), cursor["value"]
+            )
+
+        return cursor
+
+    def clean_cursor_value(self, field, value):
+        if value is None or isinstance(value, (bool, list, dict)):
+            raise NotFound(self.invalid_cursor_message)
+
+        if field.get_internal_type() in ("AutoField", "BigAutoField"):
+            if not isinstance(value, int):
+                raise NotFound(self.invalid_cursor_message)
+
+        try:
+            value = field.to_python(value)
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+
+        if isinstance(value, int) and abs(value) > self.max_cursor_int:
+            raise NotFound(self.invalid_cursor_message)
+        if isinstance(value, float) and not math.isfinite(value):
+            raise NotFound(self.invalid_cursor_message)
+
+        return value
+
+    def encode_cursor(self, instance):
+        # Pages are model instances, or dicts when the view paginates a
+        # .values() queryset.
+        if isinstance(instance, dict):
+            get_value = instance.__getitem__
+        else:
+            get_value = partial(getattr, instance)
+
+        cursor = {
+            "pk": get_value("pk"),
+            "field": self.field,
+            "reverse": self.reverse,
+        }
+        if self.field:
+            cursor["value"] = get_value(self.field)
+
+        encoded = json.dumps(cursor, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(encoded).decode("ascii")
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        url = replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            self.encode_cursor(self.page[-1]),
+        )
+        return replace_query_param(
+            url, self.page_size_query_param, self.page_size
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
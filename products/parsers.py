@@ -0,0 +1,30 @@
+import codecs
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from utils.parsers import json_loads
+
+
+class NDJSONParser(BaseParser):
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+
+        items = []
+        line_number = 0
+        try:
+            decoded_stream = codecs.getreader(encoding)(stream)
+            for line_number, line in enumerate(decoded_stream, start=1):
+                if line.strip():
+                    items.append(json_loads(line))
+        except (LookupError, UnicodeDecodeError) as exc:
+            raise ParseError(f"NDJSON decode error - {exc}")
+        except ValueError as exc:
+            raise ParseError(
+                f"NDJSON parse error on line {line_number} - {exc}"
+            )
+
+        return items
@@ -13,9 +13,14 @@ class AuthenticatedSellerOrReadOnly(permissions.BasePermission):
         return request.user.is_seller
 
 
+class IsAuthenticatedSeller(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and request.user.is_seller
+
+
 class ProductSellerOwner(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
             return True
 
-        return obj.seller == request.user
+        return obj.seller_id == request.user.id
@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from products.models import Product
+
+
+class BaseSearchBackend:
+    """
+    Returns the ids of the products matching `query`, best match first.
+    Backends that don't keep their index in the database itself can hook
+    `update` and `delete`, which run on every Product save and delete.
+    """
+
+    def search(self, query, limit, offset=0):
+        raise NotImplementedError
+
+    def update(self, product): ...
+
+    def delete(self, product): ...
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    # products_product_fts is kept in sync by the triggers created in
+    # products 0003, so bulk_create and bulk_update are covered as well.
+
+    def search(self, query, limit, offset=0):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT rowid FROM products_product_fts "
+                "WHERE products_product_fts MATCH %s "
+                "ORDER BY rank LIMIT %s OFFSET %s",
+                [self.build_match_expression(query), limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def build_match_expression(self, query):
+        terms = query.split()
+        return " ".join('"%s"' % term.replace('"', '""') for term in terms)
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    # Unranked fallback for databases without a dedicated text index.
+
+    def search(self, query, limit, offset=0):
+        queryset = Product.objects.all()
+        for term in query.split():
+            queryset = queryset.filter(description__icontains=term)
+
+        return list(
+            queryset.order_by("pk").values_list("pk", flat=True)[
+                offset : offset + limit
+            ]
+        )
+
+
+def get_search_backend():
+    backend = getattr(settings, "PRODUCTS_SEARCH_BACKEND", None)
+
+    if backend is not None:
+        return import_string(backend)()
+
+    if connection.vendor == "sqlite":
+        return SQLiteFTS5Backend()
+
+    return DatabaseSearchBackend()
@@ -0,0 +1,112 @@
+import random
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+
+from accounts.feed import newest_accounts
+from accounts.models import Account
+from django.db import connection, transaction
+
+from products import inventory
+from products.models import Product
+
+BATCH_SIZE = 5000
+EMAIL_DOMAIN = "@seed.com"
+# date_joined is spread back from here, a fixed date keeps runs identical.
+EPOCH = datetime(2022, 1, 1, tzinfo=timezone.utc)
+
+
+def seed_email(index):
+    return f"seller{index}{EMAIL_DOMAIN}"
+
+
+def iter_accounts(count, rng, password, now, seller_ratio=1.0, start=0):
+    for index in range(start, start + count):
+        yield Account(
+            email=seed_email(index),
+            password=password,
+            first_name="Seller",
+            last_name=str(index),
+            is_seller=rng.random() < seller_ratio,
+            is_superuser=False,
+            date_joined=now - timedelta(minutes=rng.randrange(10**6)),
+        )
+
+
+def iter_products(count, rng, seller_ids):
+    for index in range(count):
+        yield Product(
+            description=f"product {index}",
+            price=round(rng.uniform(1, 1000), 2),
+            quantity=rng.randrange(0, 500),
+            is_active=rng.random() < 0.8,
+            seller_id=rng.choice(seller_ids),
+        )
+
+
+def insert_in_chunks(model, objects, batch_size, progress=None):
+    # One transaction per chunk, a failure midway keeps what was written
+    # and memory stays flat however many rows are generated.
+    total = 0
+    while True:
+        chunk = list(islice(objects, batch_size))
+        if not chunk:
+            return total
+
+        with transaction.atomic():
+            model.objects.bulk_create(chunk, batch_size=batch_size)
+
+        total += len(chunk)
+        if progress is not None:
+            progress(model, total)
+
+
+def seed(
+    accounts,
+    products,
+    seed_value,
+    password="!",
+    now=EPOCH,
+    seller_ratio=1.0,
+    start=0,
+    batch_size=BATCH_SIZE,
+    progress=None,
+):
+    """
+    Inserts `accounts` accounts and `products` products generated from
+    `seed_value`, the same seed on an empty database gives the same rows.
+    Every account gets the same already encoded `password`, "!" makes them
+    unusable. Account emails are numbered from `start`. Products go to any
+    seeded seller, their ids are returned.
+    """
+    rng = random.Random(seed_value)
+
+    insert_in_chunks(
+        Account,
+        iter_accounts(accounts, rng, password, now, seller_ratio, start),
+        batch_size,
+        progress,
+    )
+
+    seller_ids = list(
+        Account.objects.filter(email__endswith=EMAIL_DOMAIN, is_seller=True)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+
+    if products and seller_ids:
+        insert_in_chunks(
+            Product,
+            iter_products(products, rng, seller_ids),
+            batch_size,
+            progress,
+        )
+
+    # bulk_create skips the signals that keep these up to date.
+    inventory.rebuild()
+    newest_accounts.clear()
+
+    if connection.vendor in ("sqlite", "postgresql"):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    return seller_ids
@@ -1,7 +1,12 @@
 from accounts.serializers import AccountSerializer, ShowSellerOnProductCreation
+from django.conf import settings
 from rest_framework import serializers
 
-from .models import Product
+from .models import Product, SellerInventory
+
+# Range of the 64 bit integer columns, larger values overflow in the query.
+MIN_INT64 = -(2**63)
+MAX_INT64 = 2**63 - 1
 
 
 class ProductCreationSerializer(serializers.ModelSerializer):
@@ -10,7 +15,7 @@ class ProductCreationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = "__all__"
-        # extra_kwargs = {"seller": {"read_only": True}}
+        extra_kwargs = {"quantity": {"max_value": MAX_INT64}}
         depth = 1
 
     def validate_quantity(self, quantity):
@@ -22,8 +27,98 @@ class ProductCreationSerializer(serializers.ModelSerializer):
 
 
 class ProductListSerializer(serializers.ModelSerializer):
-    seller_id = serializers.IntegerField(read_only=True, source="seller.id")
+    seller_id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Product
         fields = ["description", "price", "quantity", "is_active", "seller_id"]
+
+    # Fast path for large lists: the rows come straight from .values() and
+    # are copied into the output dicts without going through the fields.
+    # The model columns already hold the types the fields would return.
+
+    @classmethod
+    def values_queryset(cls, queryset):
+        return queryset.values("pk", *cls.Meta.fields)
+
+    @classmethod
+    def to_representation_values(cls, row):
+        return {field: row[field] for field in cls.Meta.fields}
+
+    @classmethod
+    def represent_values(cls, rows):
+        fields = cls.Meta.fields
+        return [{field: row[field] for field in fields} for row in rows]
+
+
+class SellerInventorySerializer(serializers.ModelSerializer):
+    seller_id = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = SellerInventory
+        fields = [
+            "seller_id",
+            "product_count",
+            "active_count",
+            "total_quantity",
+            "stock_value",
+        ]
+
+
+class ProductReservationSerializer(serializers.Serializer):
+    id = serializers.IntegerField(min_value=MIN_INT64, max_value=MAX_INT64)
+    quantity = serializers.IntegerField(min_value=1, max_value=MAX_INT64)
+
+
+class ProductFilterSerializer(serializers.Serializer):
+    ordering_fields = ["price", "quantity", "description"]
+
+    seller_id = serializers.IntegerField(
+        required=False, min_value=MIN_INT64, max_value=MAX_INT64
+    )
+    is_active = serializers.BooleanField(required=False)
+    in_stock = serializers.BooleanField(required=False)
+    min_price = serializers.FloatField(required=False)
+    max_price = serializers.FloatField(required=False)
+    min_quantity = serializers.IntegerField(
+        required=False, min_value=MIN_INT64, max_value=MAX_INT64
+    )
+    ordering = serializers.ChoiceField(
+        required=False,
+        choices=[
+            prefix + field
+            for field in ["id", *ordering_fields]
+            for prefix in ["", "-"]
+        ],
+    )
+
+    def validate(self, attrs):
+        min_price = attrs.get("min_price")
+        max_price = attrs.get("max_price")
+
+        if (
+            min_price is not None
+            and max_price is not None
+            and min_price > max_price
+        ):
+            raise serializers.ValidationError(
+                {"max_price": "Ensure this value is not lower than min_price"}
+            )
+
+        return attrs
+
+
+class ProductSearchSerializer(serializers.Serializer):
+    q = serializers.CharField()
+    limit = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        max_value=getattr(settings, "PRODUCTS_MAX_PAGE_SIZE", 100),
+        default=getattr(settings, "PRODUCTS_PAGE_SIZE", 20),
+    )
+    offset = serializers.IntegerField(
+        required=False,
+        min_value=0,
+        max_value=getattr(settings, "PRODUCTS_SEARCH_MAX_OFFSET", 1000),
+        default=0,
+    )
@@ -0,0 +1,88 @@
+from accounts.models import Account
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from utils.cache import invalidate_namespace
+
+from products.authentications import invalidate_user_tokens, token_cache
+from products.inventory import (
+    InventoryDelta,
+    get_loaded_state,
+    get_state,
+    lock_state,
+)
+from products.models import Product
+from products.search import get_search_backend
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    token_cache.delete(instance.key)
+
+
+@receiver(post_save, sender=Account)
+def invalidate_account_tokens(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_user_tokens(instance.id)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_products_responses(sender, instance, **kwargs):
+    invalidate_namespace("products")
+
+
+@receiver(post_save, sender=Product)
+def update_search_index(sender, instance, **kwargs):
+    get_search_backend().update(instance)
+
+
+@receiver(post_delete, sender=Product)
+def delete_from_search_index(sender, instance, **kwargs):
+    get_search_backend().delete(instance)
+
+
+@receiver(pre_save, sender=Product)
+def remember_inventory_state(sender, instance, using, **kwargs):
+    # Product.save() runs in a transaction, the row stays locked until the
+    # totals are updated from what it held.
+    if instance._state.adding:
+        return
+
+    instance._loaded_values = lock_state(instance, using) or {}
+
+
+@receiver(post_save, sender=Product)
+def update_inventory(sender, instance, created, **kwargs):
+    delta = InventoryDelta()
+    new = get_state(instance)
+    old = None if created else get_loaded_state(instance)
+
+    if old is None:
+        delta.add(new)
+    else:
+        delta.change(old, new)
+    delta.apply()
+
+    instance._loaded_values = new
+
+
+@receiver(pre_delete, sender=Product)
+def remember_deleted_state(sender, instance, using, **kwargs):
+    # Deletions already run in the collector's transaction.
+    instance._loaded_values = lock_state(instance, using) or {}
+
+
+@receiver(post_delete, sender=Product)
+def remove_from_inventory(sender, instance, **kwargs):
+    # A row deleted by someone else in the meantime was already counted out.
+    old = get_loaded_state(instance)
+    if old is not None:
+        delta = InventoryDelta()
+        delta.remove(old)
+        delta.apply()
@@ -1,13 +1,42 @@
+import asyncio
+import base64
+import io
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import patch
+
 import ipdb
 from accounts.models import Account
-from products.models import Product
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache, caches
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.db.models import Sum
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from products import inventory, seeding, views
+from products.authentications import TokenCache, token_cache
+from products.models import Product, SellerInventory
+from products.pagination import ProductKeysetPagination
+from products.permissions import ProductSellerOwner
 from products.serializers import (
     ProductCreationSerializer,
     ProductListSerializer,
 )
 from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
 from rest_framework.views import status
+from utils import renderers
+from utils.parsers import FastJSONParser
+from utils.renderers import FastJSONRenderer
+from utils.routers import ReplicaRouter, get_pin_key
 
 
 class TestProductsViews(APITestCase):
@@ -70,6 +99,10 @@ class TestProductsViews(APITestCase):
         cls.token_seller2 = Token.objects.create(user=cls.seller_2)
         cls.token_user = Token.objects.create(user=cls.user)
 
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+
     def test_product_creation_no_token(self):
         response = self.client.post("/api/products/", data=self.product)
 
@@ -205,3 +238,1632 @@ class TestProductsViews(APITestCase):
         self.assertIn("quantity", response.data)
         self.assertIn("is_active", response.data)
         self.assertEqual(response.data["description"], "Teste patch")
+
+    def test_product_list_keyset_pagination(self):
+        response = self.client.get("/api/products/?page_size=20")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 20)
+        self.assertIsNotNone(response.data["next"])
+
+        descriptions = [
+            product["description"] for product in response.data["results"]
+        ]
+        next_url = response.data["next"]
+        while next_url:
+            response = self.client.get(next_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            descriptions += [
+                product["description"] for product in response.data["results"]
+            ]
+            next_url = response.data["next"]
+
+        self.assertEqual(
+            descriptions, [product.description for product in self.products]
+        )
+
+    def test_product_list_keyset_pagination_with_ordering(self):
+        Product.objects.filter(pk=self.products[0].pk).update(price=1.5)
+        Product.objects.filter(pk=self.products[1].pk).update(price=99.0)
+
+        response = self.client.get(
+            "/api/products/?page_size=2&ordering=-price"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"][0]["description"],
+            self.products[1].description,
+        )
+
+        prices = []
+        next_url = response.data["next"]
+        while next_url:
+            response = self.client.get(next_url)
+            prices += [
+                product["price"] for product in response.data["results"]
+            ]
+            next_url = response.data["next"]
+
+        self.assertEqual(len(prices), len(self.products) - 2)
+        self.assertEqual(prices[-1], 1.5)
+
+    def test_product_list_page_size_limit(self):
+        with patch.object(ProductKeysetPagination, "max_page_size", 10):
+            response = self.client.get("/api/products/?page_size=1000")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 10)
+        self.assertIsNotNone(response.data["next"])
+
+    def test_product_list_invalid_cursor(self):
+        response = self.client.get("/api/products/?cursor=invalid")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_product_list_tampered_cursor(self):
+        def encode(cursor):
+            return base64.urlsafe_b64encode(
+                json.dumps(cursor).encode("utf-8")
+            ).decode("ascii")
+
+        plain = {"field": None, "reverse": False}
+        cursors = [
+            ("", {**plain, "pk": "abc"}),
+            ("", {**plain, "pk": [1]}),
+            ("", {**plain, "pk": True}),
+            ("", {**plain, "pk": 1.5}),
+            ("", {**plain, "pk": 2**70}),
+            ("price", {"field": "price", "reverse": False, "pk": 1}),
+        ]
+        for field, value in [
+            ("price", "zz"),
+            ("price", [1]),
+            ("price", None),
+            ("price", float("nan")),
+            ("quantity", "zz"),
+            ("quantity", 2**70),
+            ("description", {"a": 1}),
+        ]:
+            cursors.append(
+                (
+                    field,
+                    {
+                        "field": field,
+                        "reverse": False,
+                        "pk": 1,
+                        "value": value,
+                    },
+                )
+            )
+
+        for ordering, cursor in cursors:
+            for url in ("/api/products/", "/api/products/async/"):
+                params = {"cursor": encode(cursor)}
+                if ordering:
+                    params["ordering"] = ordering
+                response = self.client.get(url, params)
+                self.assertEqual(
+                    response.status_code,
+                    status.HTTP_404_NOT_FOUND,
+                    (url, cursor),
+                )
+
+        cursor = {"field": "price", "reverse": False, "pk": 1, "value": "1.5"}
+        response = self.client.get(
+            "/api/products/", {"ordering": "price", "cursor": encode(cursor)}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(RESPONSE_CACHE_ALIAS="default")
+    def test_product_list_cached_with_etag(self):
+        response = self.client.get("/api/products/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("ETag", response)
+        etag = response["ETag"]
+
+        with self.assertNumQueries(0):
+            cached = self.client.get("/api/products/")
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached["ETag"], etag)
+
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(
+                "/api/products/", HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(
+            not_modified.status_code, status.HTTP_304_NOT_MODIFIED
+        )
+
+    @override_settings(RESPONSE_CACHE_ALIAS="default")
+    def test_product_cache_invalidated_on_patch(self):
+        response = self.client.get("/api/products/4/")
+        etag = response["ETag"]
+
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token " + self.token_seller.key
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                "/api/products/4/", data={"description": "Teste patch"}
+            )
+
+        response = self.client.get("/api/products/4/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["description"], "Teste patch")
+        self.assertNotEqual(response["ETag"], etag)
+
+    @override_settings(RESPONSE_CACHE_ALIAS="default")
+    def test_product_cache_invalidated_after_commit(self):
+        self.client.get("/api/products/")
+        version = cache.get("products:version")
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            Product.objects.filter(id=4).get().save()
+            self.assertEqual(cache.get("products:version"), version)
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(cache.get("products:version"), version + 1)
+
+    @override_settings(RESPONSE_CACHE_ALIAS=None)
+    def test_product_responses_not_cached_without_alias(self):
+        # Without a shared cache a worker can't tell the others about a
+        # write, nothing is cached then.
+        response = self.client.get("/api/products/")
+        self.assertNotIn("ETag", response)
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/products/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(cache.get("products:version"))
+
+    def test_product_bulk_creation_partial_errors(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token " + self.token_seller.key
+        )
+        products = [
+            self.product,
+            {"description": "negative", "price": 1.0, "quantity": -1},
+            {"price": 1.0},
+            {**self.product, "description": "another"},
+        ]
+
+        response = self.client.post(
+            "/api/products/bulk/", data=products, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [created["index"] for created in response.data["created"]],
+            [0, 3],
+        )
+        self.assertEqual(
+            [error["index"] for error in response.data["errors"]], [1, 2]
+        )
+        self.assertIn(
+            "Ensure this value is an integer bigger than 0",
+            response.data["errors"][0]["errors"]["quantity"],
+        )
+        self.assertIn("description", response.data["errors"][1]["errors"])
+
+        for created in response.data["created"]:
+            product = Product.objects.get(pk=created["id"])
+            self.assertEqual(product.seller, self.seller)
+
+    def test_product_bulk_creation_ndjson(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token " + self.token_seller.key
+        )
+        lines = "\n".join(
+            json.dumps({**self.product, "description": f"ndjson {index}"})
+            for index in range(5)
+        )
+
+        response = self.client.post(
+            "/api/products/bulk/",
+            data=lines,
+            content_type="application/x-ndjson",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["created"]), 5)
+        self.assertEqual(
+            Product.objects.filter(description__startswith="ndjson").count(),
+            5,
+        )
+
+    def test_product_bulk_creation_invalid_ndjson(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token " + self.token_seller.key
+        )
+
+        for body, content_type in [
+            (b'{"description": "\xff"}\n', "application/x-ndjson"),
+            (b"{}\n{invalid\n", "application/x-ndjson"),
+            (b"{}\n", "application/x-ndjson; charset=unknown"),
+        ]:
+            response = self.client.post(
+                "/api/products/bulk/", data=body, content_type=content_type
+            )
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST, body
+            )
+
+        response = self.client.post(
+            "/api/products/bulk/",
+            data=json.dumps({**self.product, "quantity": 2**63}),
+            content_type="application/x-ndjson",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("quantity", response.data["errors"][0]["errors"])
+
+    def test_product_bulk_creation_common_user(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token " + self.token_user.key
+        )
+
+        response = self.client.post(
+            "/api/products/bulk/", data=[self.product], format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_product_bulk_update(self):
+        other_product = Product.objects.create(
+            seller=self.seller_2, **self.product
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token " + self.token_seller.key
+        )
+        patches = [
+            {"id": self.products[0].id, "price": 1.5, "quantity": 3},
+            {"id": self.products[1].id, "is_active": False},
+            {"id": other_product.id, "price": 0.5},
+            {"id": self.products[2].id, "quantity": 0},
+            {"id": 999999, "price": 2.0},
+        ]
+
+        response = self.client.patch(
+            "/api/products/bulk/", data=patches, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["updated"],
+            [
+                {"index": 0, "id": self.products[0].id},
+                {"index": 1, "id": self.products[1].id},
+            ],
+        )
+        self.assertEqual(
+            [error["index"] for error in response.data["errors"]], [2, 3, 4]
+        )
+
+        first = Product.objects.get(pk=self.products[0].id)
+        self.assertEqual((first.price, first.quantity), (1.5, 3))
+        self.assertFalse(Product.objects.get(pk=self.products[1].id).is_active)
+        other_product.refresh_from_db()
+        self.assertEqual(other_product.price, self.product["price"])
+
+    def test_product_bulk_update_requires_updatable_fields(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token " + self.token_seller.key
+        )
+        patches = [
+            {"id": self.products[0].id},
+            {"id": self.products[1].id, "description": "not updatable"},
+            {"id": self.products[2].id, "quantity": 9},
+        ]
+
+        response = self.client.patch(
+            "/api/products/bulk/", data=patches, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["updated"], [{"index": 2, "id": self.products[2].id}]
+        )
+        self.assertEqual(
+            [error["index"] for error in response.data["errors"]], [0, 1]
+        )
+        self.assertIn("non_field_errors", response.data["errors"][0]["errors"])
+
+        response = self.client.patch(
+            "/api/products/bulk/",
+            data=[{"id": self.products[0].id}],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["updated"], [])
+
+    def test_product_bulk_update_rejects_int64_overflow(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token " + self.token_seller.key
+        )
+        patches = [
+            {"id": 2**63, "price": 2.0},
+            {"id": -(2**63) - 1, "price": 2.0},
+            {"id": self.products[0].id, "quantity": 2**63},
+            {"id": self.products[1].id, "quantity": 2**63 - 1},
+        ]
+
+        response = self.client.patch(
+            "/api/products/bulk/", data=patches, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["updated"], [{"index": 3, "id": self.products[1].id}]
+        )
+        self.assertEqual(
+            [error["index"] for error in response.data["errors"]], [0, 1, 2]
+        )
+        self.assertIn("id", response.data["errors"][0]["errors"])
+        self.assertIn("quantity", response.data["errors"][2]["errors"])
+
+    def test_product_bulk_update_single_ownership_query(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token " + self.token_seller.key
+        )
+        patches = [
+            {"id": product.id, "quantity": 7} for product in self.products
+        ]
+
+        # token lookup, savepoint, ownership select, bulk update, inventory
+        # update, release
+        with self.assertNumQueries(6):
+            response = self.client.patch(
+                "/api/products/bulk/", data=patches, format="json"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["updated"]), len(self.products))
+        self.assertEqual(
+            Product.objects.filter(quantity=7).count(), len(self.products)
+        )
+
+    def test_product_list_filters(self):
+        Product.objects.create(
+            seller=self.seller_2,
+            description="seller 2 active",
+            price=5.0,
+            quantity=0,
+        )
+        Product.objects.create(
+            seller=self.seller_2,
+            description="seller 2 inactive",
+            price=20.0,
+            quantity=10,
+            is_active=False,
+        )
+
+        response = self.client.get(
+            f"/api/products/?seller_id={self.seller_2.id}&is_active=true"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [product["description"] for product in response.data],
+            ["seller 2 active"],
+        )
+
+        response = self.client.get("/api/products/?min_price=15")
+        self.assertEqual(
+            [product["description"] for product in response.data],
+            ["seller 2 inactive"],
+        )
+
+        response = self.client.get("/api/products/?max_price=6&in_stock=0")
+        self.assertEqual(
+            [product["description"] for product in response.data],
+            ["seller 2 active"],
+        )
+
+        response = self.client.get("/api/products/?ordering=-price")
+        self.assertEqual(response.data[0]["description"], "seller 2 inactive")
+        self.assertEqual(response.data[-1]["description"], "seller 2 active")
+
+    def test_product_list_invalid_filters(self):
+        response = self.client.get(
+            "/api/products/?min_price=abc&ordering=seller"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("min_price", response.data)
+        self.assertIn("ordering", response.data)
+
+        response = self.client.get(
+            f"/api/products/?seller_id={2**63}&min_quantity={-(2**63) - 1}"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("seller_id", response.data)
+        self.assertIn("min_quantity", response.data)
+
+    def test_product_search_ranked(self):
+        best = Product.objects.create(
+            seller=self.seller,
+            description="red shoes red laces",
+            price=1.0,
+            quantity=1,
+        )
+        other = Product.objects.create(
+            seller=self.seller,
+            description="red shirt with a long description about cotton",
+            price=1.0,
+            quantity=1,
+        )
+
+        response = self.client.get("/api/products/search/?q=red")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [product["description"] for product in response.data["results"]],
+            [best.description, other.description],
+        )
+        self.assertIsNone(response.data["next"])
+
+    def test_product_search_index_follows_writes(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token " + self.token_seller.key
+        )
+        self.client.patch(
+            f"/api/products/{self.products[0].id}/",
+            data={"description": "brand new keyboard"},
+        )
+
+        response = self.client.get("/api/products/search/?q=keyboard")
+        self.assertEqual(len(response.data["results"]), 1)
+
+        response = self.client.get(
+            f"/api/products/search/?q={self.products[0].description}"
+        )
+        self.assertNotIn(
+            self.products[0].description,
+            [product["description"] for product in response.data["results"]],
+        )
+
+    def test_product_search_pagination(self):
+        response = self.client.get(
+            "/api/products/search/?q=description&limit=20"
+        )
+        self.assertEqual(len(response.data["results"]), 20)
+
+        descriptions = []
+        while True:
+            descriptions += [
+                product["description"] for product in response.data["results"]
+            ]
+            if not response.data["next"]:
+                break
+            response = self.client.get(response.data["next"])
+
+        self.assertEqual(len(set(descriptions)), len(self.products))
+
+    def test_product_search_offset_capped(self):
+        response = self.client.get(
+            "/api/products/search/?q=description&offset=1000"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        for offset in (1001, 2**63):
+            response = self.client.get(
+                f"/api/products/search/?q=description&offset={offset}"
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("offset", response.data)
+
+    def test_product_search_requires_query(self):
+        response = self.client.get("/api/products/search/")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("q", response.data)
+
+    def test_product_list_instrumentation_headers(self):
+        response = self.client.get("/api/products/")
+
+        self.assertEqual(response["X-Query-Count"], "1")
+        self.assertIn("db;dur=", response["Server-Timing"])
+        self.assertIn('desc="1 queries"', response["Server-Timing"])
+        self.assertIn("total;dur=", response["Server-Timing"])
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_slow_queries_are_logged_with_view(self):
+        with self.assertLogs("komercio.instrumentation", "WARNING") as logs:
+            self.client.get("/api/products/4/")
+
+        self.assertIn("ProductsDetailsView", logs.output[0])
+        self.assertIn("products_product", logs.output[0])
+
+    def test_metrics_only_for_superuser(self):
+        self.client.get("/api/products/")
+
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token " + self.token_seller.key
+        )
+        response = self.client.get("/api/metrics/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token " + self.token_admin.key
+        )
+        response = self.client.get("/api/metrics/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreaterEqual(response.data["ProductsView"]["requests"], 1)
+
+    def test_product_export_ndjson(self):
+        with patch.object(views.ProductsExportView, "chunk_size", 10):
+            response = self.client.get("/api/products/export/")
+            content = b"".join(response.streaming_content).decode("utf-8")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(
+            rows, ProductListSerializer(self.products, many=True).data
+        )
+
+    def test_product_export_json_with_filters(self):
+        with patch.object(views.ProductsExportView, "chunk_size", 10):
+            response = self.client.get(
+                "/api/products/export/?output=json&ordering=-id"
+            )
+            rows = json.loads(b"".join(response.streaming_content))
+
+        self.assertEqual(
+            rows,
+            ProductListSerializer(self.products[::-1], many=True).data,
+        )
+
+        response = self.client.get(
+            f"/api/products/export/?output=json&seller_id={self.seller_2.id}"
+        )
+        self.assertEqual(json.loads(b"".join(response.streaming_content)), [])
+
+    def test_product_fast_serialization_same_output(self):
+        urls = [
+            "/api/products/",
+            "/api/products/?page_size=7&ordering=-price",
+            "/api/products/export/",
+        ]
+        urls.append(self.client.get(urls[1]).data["next"])
+
+        for url in urls:
+            cache.clear()
+            response = self.client.get(url)
+            expected = b"".join(
+                response.streaming_content
+                if response.streaming
+                else [response.content]
+            )
+
+            cache.clear()
+            with override_settings(PRODUCTS_FAST_SERIALIZATION=True):
+                response = self.client.get(url)
+                content = b"".join(
+                    response.streaming_content
+                    if response.streaming
+                    else [response.content]
+                )
+
+            self.assertEqual(content, expected, url)
+
+    def test_fast_json_renderer_matches_drf_output(self):
+        data = ProductListSerializer(self.products, many=True).data
+        data[0]["description"] = 'unicode "ção" \n escaped'
+        expected = JSONRenderer().render(data)
+
+        self.assertEqual(FastJSONRenderer().render(data), expected)
+        with patch("utils.renderers.orjson", None):
+            self.assertEqual(FastJSONRenderer().render(data), expected)
+
+    def test_fast_json_renderer_matches_drf_edge_cases(self):
+        moment = datetime(2022, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc)
+        payloads = [
+            {"errors": {0: ["bad"], 3: {"price": ["worse"]}}},
+            {"wide": 2**70, "negative": -(2**64)},
+            {"aware": moment, "naive": moment.replace(tzinfo=None)},
+            {"date": moment.date(), "time": moment.time()},
+            {"separators": "a\u2028b\u2029c", "null": None},
+            {"decimal": Decimal("1.10"), "flags": {True: 1, None: 2}},
+            ["null", 1.5, -0.0],
+        ]
+
+        for orjson in (renderers.orjson, None):
+            with patch("utils.renderers.orjson", orjson):
+                for data in payloads:
+                    expected = JSONRenderer().render(data)
+                    self.assertEqual(
+                        FastJSONRenderer().render(data), expected, data
+                    )
+                    self.assertEqual(renderers.json_dumps(data), expected)
+
+        for value in (float("nan"), float("inf"), -float("inf")):
+            with self.assertRaises(ValueError):
+                JSONRenderer().render({"value": value})
+            if renderers.orjson is not None:
+                self.assertEqual(
+                    FastJSONRenderer().render({"value": value}),
+                    b'{"value":null}',
+                )
+            with patch("utils.renderers.orjson", None):
+                with self.assertRaises(ValueError):
+                    FastJSONRenderer().render({"value": value})
+
+    def test_fast_json_renderer_encodes_nulls_once(self):
+        data = ProductListSerializer(self.products, many=True).data
+        data[0]["description"] = None
+        expected = JSONRenderer().render(data)
+
+        with patch("utils.renderers.stdlib_dumps", side_effect=AssertionError):
+            self.assertEqual(FastJSONRenderer().render(data), expected)
+
+    def test_fast_json_parser(self):
+        body = JSONRenderer().render(self.product)
+
+        for orjson in (renderers.orjson, None):
+            with patch("utils.parsers.orjson", orjson):
+                self.assertEqual(
+                    FastJSONParser().parse(io.BytesIO(body)), self.product
+                )
+                with self.assertRaises(ParseError):
+                    FastJSONParser().parse(io.BytesIO(b"{invalid"))
+
+
+class TestProductsViewsQueries(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        Account.objects.bulk_create(
+            [
+                Account(
+                    email=f"seller{seller_id}@mail.com",
+                    first_name="Seller",
+                    last_name=f"{seller_id}",
+                    is_seller=True,
+                )
+                for seller_id in range(100)
+            ]
+        )
+        sellers = Account.objects.order_by("id")
+
+        Product.objects.bulk_create(
+            [
+                Product(
+                    description=f"description {product_id}",
+                    price=10.99,
+                    quantity=50,
+                    seller=sellers[product_id % 100],
+                )
+                for product_id in range(1000)
+            ]
+        )
+        inventory.rebuild()
+
+        cls.seller = sellers[0]
+        cls.token_seller = Token.objects.create(user=cls.seller)
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+
+    def test_product_list_constant_queries(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/products/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1000)
+        self.assertEqual(
+            len({product["seller_id"] for product in response.data}), 100
+        )
+
+    def test_product_patch_reuses_authenticated_seller(self):
+        product = Product.objects.filter(seller=self.seller).first()
+
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token " + self.token_seller.key
+        )
+
+        # token lookup, savepoint, locked product, row locked again by the
+        # inventory signal, update, inventory update, release
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                f"/api/products/{product.id}/", data={"quantity": 10}
+            )
+
+        self.assertEqual(len(queries), 7)
+        self.assertNotIn("accounts_account", queries[2]["sql"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["seller"]["id"], self.seller.id)
+        self.assertEqual(response.data["seller"]["email"], self.seller.email)
+
+    def test_product_patch_forbidden_without_loading_seller(self):
+        product = Product.objects.exclude(seller=self.seller).first()
+
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token " + self.token_seller.key
+        )
+
+        # token lookup, savepoint, locked product, rollback, release
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                f"/api/products/{product.id}/", data={"quantity": 10}
+            )
+
+        self.assertEqual(len(queries), 5)
+        self.assertNotIn("accounts_account", queries[2]["sql"])
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(Product.objects.get(pk=product.pk).quantity, 50)
+
+    def test_ownership_checks_without_queries(self):
+        products = list(Product.objects.order_by("id")[:4])
+        permission = ProductSellerOwner()
+        request = SimpleNamespace(method="PATCH", user=self.seller)
+
+        with self.assertNumQueries(0):
+            allowed = [
+                permission.has_object_permission(request, None, product)
+                for product in products
+            ]
+
+        self.assertEqual(
+            allowed,
+            [product.seller_id == self.seller.id for product in products],
+        )
+
+    def test_owned_by_filters_on_seller_column(self):
+        queryset = Product.objects.owned_by(self.seller)
+
+        self.assertNotIn("accounts_account", str(queryset.query))
+        with self.assertNumQueries(1):
+            self.assertEqual(len(queryset), 10)
+
+    def test_product_bulk_update_only_loads_own_products(self):
+        own = list(
+            Product.objects.filter(seller=self.seller).values_list(
+                "id", flat=True
+            )[:3]
+        )
+        other = Product.objects.exclude(seller=self.seller).first()
+
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token " + self.token_seller.key
+        )
+        patches = [{"id": product_id, "quantity": 7} for product_id in own]
+        patches.append({"id": other.id, "quantity": 7})
+
+        # token lookup, savepoint, owned products, bulk update, inventory
+        # update, release, lookup of the products left out
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                "/api/products/bulk/", data=patches, format="json"
+            )
+
+        self.assertEqual(len(queries), 7)
+        self.assertIn('"seller_id" =', queries[2]["sql"])
+        self.assertNotIn("accounts_account", queries[2]["sql"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["updated"]), 3)
+        self.assertEqual(
+            response.data["errors"],
+            [
+                {
+                    "index": 3,
+                    "errors": {
+                        "detail": "You do not have permission to "
+                        "perform this action."
+                    },
+                }
+            ],
+        )
+        self.assertEqual(Product.objects.get(pk=other.id).quantity, 50)
+
+
+class TestCachedTokenAuthentication(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.seller = Account.objects.create_user(
+            email="john@doe.com",
+            password="abcd",
+            first_name="John",
+            last_name="Doe",
+            is_seller=True,
+        )
+        cls.admin = Account.objects.create_superuser(
+            email="admin@admin.com",
+            password="1234",
+            first_name="Admin",
+            last_name="User",
+        )
+        cls.token_seller = Token.objects.create(user=cls.seller)
+        cls.token_admin = Token.objects.create(user=cls.admin)
+
+        cls.product = {
+            "description": "test description",
+            "price": 10.50,
+            "quantity": 50,
+        }
+
+    def setUp(self):
+        token_cache.clear()
+
+    def test_token_lookup_is_cached(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token " + self.token_seller.key
+        )
+
+        # token lookup, insert, inventory update, then savepoint, insert and
+        # release for the seller's first inventory row
+        with self.assertNumQueries(6):
+            response = self.client.post("/api/products/", data=self.product)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # insert, inventory update
+        with self.assertNumQueries(2):
+            response = self.client.post("/api/products/", data=self.product)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_deleted_token_is_invalidated(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token " + self.token_seller.key
+        )
+        response = self.client.post("/api/products/", data=self.product)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        Token.objects.filter(key=self.token_seller.key).delete()
+
+        response = self.client.post("/api/products/", data=self.product)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_account_is_invalidated(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token " + self.token_seller.key
+        )
+        response = self.client.post("/api/products/", data=self.product)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token " + self.token_admin.key
+        )
+        response = self.client.patch(
+            f"/api/accounts/{self.seller.id}/management/",
+            data={"is_active": False},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token " + self.token_seller.key
+        )
+        response = self.client.post("/api/products/", data=self.product)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_shared_cache_delete_reaches_other_instances(self):
+        worker_a = TokenCache(maxsize=8, ttl=60, alias="default")
+        worker_b = TokenCache(maxsize=8, ttl=60, alias="default")
+        self.addCleanup(caches["default"].clear)
+
+        worker_a.set(self.token_seller.key, self.seller)
+        self.assertEqual(worker_b.get(self.token_seller.key), self.seller)
+
+        worker_a.delete(self.token_seller.key)
+        self.assertIsNone(worker_b.get(self.token_seller.key))
+        self.assertIsNone(worker_a.get(self.token_seller.key))
+
+
+class TestAsyncProductsViews(TransactionTestCase):
+    def setUp(self):
+        self.seller = Account.objects.create(
+            email="seller@mail.com",
+            first_name="John",
+            last_name="Doe",
+            is_seller=True,
+        )
+        self.products = [
+            Product.objects.create(
+                description=f"description {product_id}",
+                price=10.99,
+                quantity=50,
+                seller=self.seller,
+            )
+            for product_id in range(1, 30)
+        ]
+        self.expected = ProductListSerializer(self.products, many=True).data
+
+    async def test_async_product_list(self):
+        response = await self.async_client.get("/api/products/async/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), self.expected)
+
+    async def test_async_product_list_pagination_and_filters(self):
+        response = await self.async_client.get(
+            f"/api/products/async/?seller_id={self.seller.id}&page_size=20"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"], self.expected[:20])
+        self.assertIsNotNone(response.json()["next"])
+
+        response = await self.async_client.get(
+            "/api/products/async/?min_price=abc"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("min_price", response.json())
+
+        for field in ("seller_id", "min_quantity"):
+            for value in (2**63, -(2**63) - 1):
+                response = await self.async_client.get(
+                    f"/api/products/async/?{field}={value}"
+                )
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST
+                )
+                self.assertIn(field, response.json())
+
+    async def test_async_product_detail_concurrent(self):
+        responses = await asyncio.gather(
+            *[
+                self.async_client.get(f"/api/products/async/{product.id}/")
+                for product in self.products
+            ]
+        )
+
+        self.assertEqual(
+            [response.json() for response in responses], self.expected
+        )
+
+    async def test_async_instrumentation_counts_db_thread_queries(self):
+        # async view, queries on db_executor
+        response = await self.async_client.get(
+            f"/api/products/async/{self.products[0].id}/"
+        )
+        self.assertEqual(response["X-Query-Count"], "1")
+        self.assertIn('desc="1 queries"', response["Server-Timing"])
+
+        # sync DRF view run by the ASGI handler through sync_to_async
+        response = await self.async_client.get("/api/products/")
+        self.assertEqual(response["X-Query-Count"], "1")
+
+        responses = await asyncio.gather(
+            *[
+                self.async_client.get(f"/api/products/async/{product.id}/")
+                for product in self.products[:5]
+            ]
+        )
+        self.assertEqual(
+            [response["X-Query-Count"] for response in responses], ["1"] * 5
+        )
+
+    async def asgi_get(self, path, query_string=b""):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "query_string": query_string,
+            "headers": [(b"host", b"testserver")],
+        }
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        await ASGIHandler()(scope, receive, send)
+        body = b"".join(
+            message.get("body", b"")
+            for message in messages
+            if message["type"] == "http.response.body"
+        )
+        return messages[0]["status"], body
+
+    async def test_export_through_asgi_handler(self):
+        with patch.object(views.ProductsExportView, "chunk_size", 7):
+            status_code, body = await self.asgi_get("/api/products/export/")
+
+        self.assertEqual(status_code, status.HTTP_200_OK)
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(rows, self.expected)
+
+        status_code, body = await self.asgi_get(
+            "/api/products/export/", b"output=json&ordering=-id"
+        )
+        self.assertEqual(json.loads(body), self.expected[::-1])
+
+    async def test_async_product_detail_not_found(self):
+        response = await self.async_client.get("/api/products/async/0/")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(
+    DATABASE_REPLICAS=["replica_0"], REPLICA_PIN_CACHE_ALIAS="default"
+)
+class TestReplicaRouting(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.seller = Account.objects.create_user(
+            email="seller@replica.com",
+            password="abcd",
+            first_name="Seller",
+            last_name="Replica",
+            is_seller=True,
+        )
+        cls.token = Token.objects.create(user=cls.seller)
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.routed = []
+
+        # Record where the router sends reads but keep them on the test
+        # database, there is no replica_0 connection configured here.
+        db_for_read = ReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            self.routed.append(db_for_read(router, model, **hints))
+            return "default"
+
+        patcher = patch.object(ReplicaRouter, "db_for_read", record)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_product_reads_go_to_replica(self):
+        response = self.client.get("/api/products/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(self.routed)
+        self.assertEqual(set(self.routed), {"replica_0"})
+
+    def test_product_writes_read_from_default(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+        response = self.client.post(
+            "/api/products/",
+            {"description": "Replica", "price": 10, "quantity": 1},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(set(self.routed), {"default"})
+
+    def test_writer_reads_own_writes_from_default(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+        self.client.post(
+            "/api/products/",
+            {"description": "Replica", "price": 10, "quantity": 1},
+            format="json",
+        )
+        self.routed.clear()
+
+        response = self.client.get("/api/products/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(self.routed), {"default"})
+
+        self.routed.clear()
+        self.client.credentials()
+        self.client.get("/api/products/?is_active=true")
+        self.assertEqual(set(self.routed), {"replica_0"})
+
+    @override_settings(REPLICA_STICKY_SECONDS=0)
+    def test_writer_back_on_replicas_after_window(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+        self.client.post(
+            "/api/products/",
+            {"description": "Replica", "price": 10, "quantity": 1},
+            format="json",
+        )
+        self.routed.clear()
+
+        self.client.get("/api/products/")
+        self.assertEqual(set(self.routed), {"replica_0"})
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            },
+            "shared": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "shared",
+            },
+        },
+        REPLICA_PIN_CACHE_ALIAS="shared",
+    )
+    def test_writer_pin_kept_on_pin_cache(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+        self.client.post(
+            "/api/products/",
+            {"description": "Replica", "price": 10, "quantity": 1},
+            format="json",
+        )
+        # Another worker doesn't share this process' default cache.
+        caches["default"].clear()
+        self.routed.clear()
+
+        self.assertTrue(caches["shared"].get(get_pin_key(self.seller.id)))
+        self.client.get("/api/products/")
+        self.assertEqual(set(self.routed), {"default"})
+
+    @override_settings(REPLICA_PIN_CACHE_ALIAS=None)
+    def test_authenticated_reads_stay_on_default_without_pin_cache(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token " + self.token.key)
+        self.client.get("/api/products/")
+        self.assertEqual(set(self.routed), {"default"})
+
+        self.routed.clear()
+        self.client.credentials()
+        self.client.get("/api/products/")
+        self.assertEqual(set(self.routed), {"replica_0"})
+
+    @override_settings(RESPONSE_CACHE_ALIAS="default")
+    def test_cached_responses_filled_from_default(self):
+        response = self.client.get("/api/products/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(self.routed), {"default"})
+
+        self.routed.clear()
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/products/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.routed, [])
+
+    def test_reads_outside_requests_use_default(self):
+        list(Product.objects.all())
+
+        self.assertEqual(self.routed, ["default"])
+        self.assertEqual(ReplicaRouter().db_for_write(Product), "default")
+
+    def test_sqlite_pragmas_applied(self):
+        if connection.vendor != "sqlite" or not getattr(
+            connection, "pragmas", None
+        ):
+            self.skipTest("utils.sqlite3 backend not in use")
+
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute("PRAGMA temp_store")
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+    def test_sqlite_transactions_begin_immediate(self):
+        if not getattr(connection, "transaction_mode", None):
+            self.skipTest("utils.sqlite3 backend not in use")
+
+        # The test database is locked by the test case's transaction.
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        other = type(connections["default"])(
+            {
+                **connection.settings_dict,
+                "NAME": os.path.join(directory.name, "db.sqlite3"),
+            },
+            alias="immediate",
+        )
+        self.addCleanup(other.close)
+
+        with CaptureQueriesContext(other) as queries:
+            # What Atomic.__enter__ runs on SQLite.
+            other._start_transaction_under_autocommit()
+            other.cursor().execute("ROLLBACK")
+
+        self.assertEqual(queries[0]["sql"], "BEGIN IMMEDIATE")
+
+
+class TestSellerInventory(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.seller = Account.objects.create_user(
+            email="seller@inventory.com",
+            password="abcd",
+            first_name="Seller",
+            last_name="Inventory",
+            is_seller=True,
+        )
+        cls.buyer = Account.objects.create_user(
+            email="buyer@inventory.com",
+            password="abcd",
+            first_name="Buyer",
+            last_name="Inventory",
+            is_seller=False,
+        )
+        cls.token_seller = Token.objects.create(user=cls.seller)
+        cls.token_buyer = Token.objects.create(user=cls.buyer)
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token " + self.token_seller.key
+        )
+
+    def get_totals(self):
+        response = self.client.get("/api/products/inventory/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def assertMatchesRebuild(self):
+        totals = self.get_totals()
+        inventory.rebuild([self.seller.id])
+        self.assertEqual(totals, self.get_totals())
+
+    def test_inventory_without_products(self):
+        self.assertEqual(
+            self.get_totals(),
+            {
+                "seller_id": self.seller.id,
+                "product_count": 0,
+                "active_count": 0,
+                "total_quantity": 0,
+                "stock_value": 0,
+            },
+        )
+
+    def test_inventory_follows_product_writes(self):
+        response = self.client.post(
+            "/api/products/",
+            {"description": "a", "price": 10, "quantity": 3},
+            format="json",
+        )
+        product_id = response.data["id"]
+        self.client.post(
+            "/api/products/",
+            {"description": "b", "price": 2.5, "quantity": 4},
+            format="json",
+        )
+
+        totals = self.get_totals()
+        self.assertEqual(totals["product_count"], 2)
+        self.assertEqual(totals["active_count"], 2)
+        self.assertEqual(totals["total_quantity"], 7)
+        self.assertAlmostEqual(totals["stock_value"], 40.0)
+
+        self.client.patch(
+            f"/api/products/{product_id}/",
+            {"quantity": 1, "is_active": False},
+            format="json",
+        )
+
+        totals = self.get_totals()
+        self.assertEqual(totals["active_count"], 1)
+        self.assertEqual(totals["total_quantity"], 5)
+        self.assertAlmostEqual(totals["stock_value"], 20.0)
+        self.assertMatchesRebuild()
+
+        Product.objects.get(id=product_id).delete()
+
+        totals = self.get_totals()
+        self.assertEqual(totals["product_count"], 1)
+        self.assertEqual(totals["total_quantity"], 4)
+        self.assertMatchesRebuild()
+
+    def test_inventory_with_stale_instances(self):
+        product = Product.objects.create(
+            description="stale", price=2.0, quantity=10, seller=self.seller
+        )
+        stale = Product.objects.get(pk=product.pk)
+        other = Product.objects.get(pk=product.pk)
+
+        # A reservation and another write land after `stale` was loaded.
+        inventory.reserve({product.pk: 4})
+        other.is_active = False
+        other.save()
+
+        stale.price = 3.0
+        stale.save()
+
+        totals = self.get_totals()
+        self.assertEqual(totals["product_count"], 1)
+        self.assertEqual(totals["active_count"], 1)
+        self.assertEqual(totals["total_quantity"], 10)
+        self.assertAlmostEqual(totals["stock_value"], 30.0)
+        self.assertMatchesRebuild()
+
+        other.delete()
+        stale.delete()
+
+        totals = self.get_totals()
+        self.assertEqual(totals["product_count"], 0)
+        self.assertEqual(totals["total_quantity"], 0)
+        self.assertMatchesRebuild()
+
+    def test_inventory_follows_bulk_writes(self):
+        response = self.client.post(
+            "/api/products/bulk/",
+            [
+                {"description": f"bulk {index}", "price": 1.5, "quantity": 2}
+                for index in range(10)
+            ],
+            format="json",
+        )
+        ids = [row["id"] for row in response.data["created"]]
+
+        self.client.patch(
+            "/api/products/bulk/",
+            [{"id": product_id, "quantity": 4} for product_id in ids[:5]]
+            + [{"id": ids[5], "is_active": False}],
+            format="json",
+        )
+
+        totals = self.get_totals()
+        self.assertEqual(totals["product_count"], 10)
+        self.assertEqual(totals["active_count"], 9)
+        self.assertEqual(totals["total_quantity"], 30)
+        self.assertAlmostEqual(totals["stock_value"], 45.0)
+        self.assertMatchesRebuild()
+
+    def test_inventory_constant_queries(self):
+        Product.objects.bulk_create(
+            Product(
+                description=str(index),
+                price=1,
+                quantity=1,
+                seller=self.seller,
+            )
+            for index in range(500)
+        )
+        inventory.rebuild()
+
+        # token lookup, inventory row
+        with self.assertNumQueries(2):
+            totals = self.get_totals()
+        self.assertEqual(totals["product_count"], 500)
+
+    def test_inventory_requires_seller(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token " + self.token_buyer.key
+        )
+        response = self.client.get("/api/products/inventory/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.credentials()
+        response = self.client.get("/api/products/inventory/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TestProductsReserve(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.seller = Account.objects.create_user(
+            email="seller@reserve.com",
+            password="abcd",
+            first_name="Seller",
+            last_name="Reserve",
+            is_seller=True,
+        )
+        cls.buyer = Account.objects.create_user(
+            email="buyer@reserve.com",
+            password="abcd",
+            first_name="Buyer",
+            last_name="Reserve",
+            is_seller=False,
+        )
+        cls.token_buyer = Token.objects.create(user=cls.buyer)
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.client.credentials(
+            HTTP_AUTHORIZATION="Token " + self.token_buyer.key
+        )
+        self.products = [
+            Product.objects.create(
+                description=f"reserve {index}",
+                price=2.0,
+                quantity=5,
+                seller=self.seller,
+            )
+            for index in range(3)
+        ]
+
+    def get_quantities(self):
+        return list(
+            Product.objects.filter(seller=self.seller)
+            .order_by("id")
+            .values_list("quantity", flat=True)
+        )
+
+    def test_reserve_batch(self):
+        first, second, third = self.products
+
+        # token lookup, savepoint, one update per product, price select,
+        # inventory update, release
+        with self.assertNumQueries(8):
+            response = self.client.post(
+                "/api/products/reserve/",
+                [
+                    {"id": third.id, "quantity": 1},
+                    {"id": first.id, "quantity": 2},
+                    {"id": second.id, "quantity": 5},
+                ],
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["reserved"],
+            [
+                {"id": first.id, "quantity": 2},
+                {"id": second.id, "quantity": 5},
+                {"id": third.id, "quantity": 1},
+            ],
+        )
+        self.assertEqual(self.get_quantities(), [3, 0, 4])
+
+        totals = self.seller.inventory
+        totals.refresh_from_db()
+        self.assertEqual(totals.total_quantity, 7)
+        self.assertAlmostEqual(totals.stock_value, 14.0)
+
+    def test_reserve_merges_duplicated_ids(self):
+        product = self.products[0]
+
+        response = self.client.post(
+            "/api/products/reserve/",
+            [
+                {"id": product.id, "quantity": 3},
+                {"id": product.id, "quantity": 3},
+            ],
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(self.get_quantities(), [5, 5, 5])
+
+    def test_reserve_is_all_or_nothing(self):
+        first, second, third = self.products
+        Product.objects.filter(id=third.id).update(is_active=False)
+
+        response = self.client.post(
+            "/api/products/reserve/",
+            [
+                {"id": first.id, "quantity": 1},
+                {"id": second.id, "quantity": 6},
+                {"id": third.id, "quantity": 1},
+                {"id": 0, "quantity": 1},
+            ],
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            [error["id"] for error in response.data["errors"]],
+            [0, second.id, third.id],
+        )
+        self.assertEqual(self.get_quantities(), [5, 5, 5])
+
+    def test_reserve_validation(self):
+        response = self.client.post(
+            "/api/products/reserve/",
+            [{"id": self.products[0].id, "quantity": 0}],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(
+            "/api/products/reserve/", [], format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with patch.object(views.ProductsReserveView, "max_items", 2):
+            response = self.client.post(
+                "/api/products/reserve/",
+                [
+                    {"id": product.id, "quantity": 1}
+                    for product in self.products
+                ],
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.get_quantities(), [5, 5, 5])
+
+    def test_reserve_rejects_int64_overflow(self):
+        product = self.products[0]
+
+        for item in [
+            {"id": 2**63, "quantity": 1},
+            {"id": -(2**63) - 1, "quantity": 1},
+            {"id": product.id, "quantity": 2**63},
+        ]:
+            response = self.client.post(
+                "/api/products/reserve/", [item], format="json"
+            )
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST, item
+            )
+
+        response = self.client.post(
+            "/api/products/reserve/",
+            [
+                {"id": product.id, "quantity": 2**63 - 1},
+                {"id": product.id, "quantity": 1},
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["errors"][0]["id"], product.id)
+        self.assertEqual(self.get_quantities(), [5, 5, 5])
+
+    def test_reserve_requires_authentication(self):
+        self.client.credentials()
+        response = self.client.post(
+            "/api/products/reserve/",
+            [{"id": self.products[0].id, "quantity": 1}],
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TestSeedCommand(APITestCase):
+    def seed(self, *args):
+        stdout = io.StringIO()
+        call_command("seed", *args, stdout=stdout, stderr=io.StringIO())
+        return stdout.getvalue()
+
+    def dump(self):
+        accounts = list(
+            Account.objects.order_by("email").values_list(
+                "email", "is_seller", "date_joined"
+            )
+        )
+        products = list(
+            Product.objects.order_by("id").values_list(
+                "description",
+                "price",
+                "quantity",
+                "is_active",
+                "seller__email",
+            )
+        )
+        return accounts, products
+
+    def test_seed_creates_accounts_and_products(self):
+        output = self.seed(
+            "--accounts", "20", "--products", "50", "--batch-size", "7"
+        )
+
+        self.assertIn("Seeded 20 accounts and 50 products", output)
+        self.assertEqual(Account.objects.count(), 20)
+        self.assertEqual(Product.objects.count(), 50)
+        self.assertEqual(
+            SellerInventory.objects.aggregate(total=Sum("product_count"))[
+                "total"
+            ],
+            50,
+        )
+
+    def test_seed_is_deterministic(self):
+        self.seed("--accounts", "10", "--products", "30", "--seed", "7")
+        first = self.dump()
+
+        Product.objects.all().delete()
+        Account.objects.all().delete()
+        self.seed("--accounts", "10", "--products", "30", "--seed", "7")
+
+        self.assertEqual(self.dump(), first)
+
+    def test_seed_hashes_the_password_once(self):
+        with patch(
+            "products.management.commands.seed.make_password",
+            wraps=make_password,
+        ) as hasher:
+            self.seed(
+                "--accounts", "5", "--products", "0", "--password", "abcd"
+            )
+
+        self.assertEqual(hasher.call_count, 1)
+        account = Account.objects.get(email=seeding.seed_email(4))
+        self.assertTrue(account.check_password("abcd"))
+
+    def test_seed_refuses_to_reuse_emails(self):
+        self.seed("--accounts", "5", "--products", "0")
+
+        with self.assertRaises(CommandError):
+            self.seed("--accounts", "5", "--products", "0")
+
+        self.seed("--accounts", "5", "--products", "5", "--start", "5")
+        self.assertEqual(Account.objects.count(), 10)
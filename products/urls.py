@@ -1,8 +1,15 @@
 from django.urls import path
 
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path("products/", views.ProductsView.as_view()),
+    path("products/bulk/", views.ProductsBulkView.as_view()),
+    path("products/search/", views.ProductsSearchView.as_view()),
+    path("products/export/", views.ProductsExportView.as_view()),
+    path("products/inventory/", views.ProductsInventoryView.as_view()),
+    path("products/reserve/", views.ProductsReserveView.as_view()),
+    path("products/async/", async_views.products_view),
+    path("products/async/<int:pk>/", async_views.products_details_view),
     path("products/<pk>/", views.ProductsDetailsView.as_view()),
 ]
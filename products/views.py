@@ -1,26 +1,65 @@
+import contextvars
+import queue
+import threading
+from collections import defaultdict
+
 import ipdb
 from accounts.models import Account
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections, transaction
+from django.http import StreamingHttpResponse
 from rest_framework import generics
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import Response, status
-from utils.mixins import SerializerByMethodMixin
+from utils.cache import invalidate_namespace
+from utils.mixins import (
+    CachedResponseMixin,
+    ReplicaReadsMixin,
+    SerializerByMethodMixin,
+)
+from utils.parsers import FastJSONParser
+from utils.renderers import json_dumps
 
+from products.authentications import CachedTokenAuthentication
+from products.filters import ProductFilterBackend
+from products.exceptions import InsufficientStockError
+from products.inventory import InventoryDelta, get_state, reserve
+from products.pagination import ProductKeysetPagination
+from products.parsers import NDJSONParser
 from products.permissions import (
     AuthenticatedSellerOrReadOnly,
+    IsAuthenticatedSeller,
     ProductSellerOwner,
 )
+from products.search import get_search_backend
 from products.serializers import (
+    MAX_INT64,
+    MIN_INT64,
     ProductCreationSerializer,
     ProductListSerializer,
+    ProductReservationSerializer,
+    ProductSearchSerializer,
+    SellerInventorySerializer,
 )
 
-from .models import Product
+from .models import Product, SellerInventory
 
 
-class ProductsView(SerializerByMethodMixin, generics.ListCreateAPIView):
-    authentication_classes = [TokenAuthentication]
+class ProductsView(
+    ReplicaReadsMixin,
+    CachedResponseMixin,
+    SerializerByMethodMixin,
+    generics.ListCreateAPIView,
+):
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [AuthenticatedSellerOrReadOnly]
+    pagination_class = ProductKeysetPagination
+    filter_backends = [ProductFilterBackend]
+    response_cache_namespace = "products"
 
     queryset = Product.objects.all()
     serializer_map = {
@@ -28,6 +67,26 @@ class ProductsView(SerializerByMethodMixin, generics.ListCreateAPIView):
         "POST": ProductCreationSerializer,
     }
 
+    @property
+    def fast_serialization(self):
+        return getattr(settings, "PRODUCTS_FAST_SERIALIZATION", False)
+
+    def list(self, request, *args, **kwargs):
+        if not self.fast_serialization:
+            return super().list(request, *args, **kwargs)
+
+        queryset = ProductListSerializer.values_queryset(
+            self.filter_queryset(self.get_queryset())
+        )
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                ProductListSerializer.represent_values(page)
+            )
+
+        return Response(ProductListSerializer.represent_values(queryset))
+
     def perform_create(self, serializer):
         seller = self.request.user
 
@@ -35,14 +94,465 @@ class ProductsView(SerializerByMethodMixin, generics.ListCreateAPIView):
 
 
 class ProductsDetailsView(
-    SerializerByMethodMixin, generics.RetrieveUpdateAPIView
+    ReplicaReadsMixin,
+    CachedResponseMixin,
+    SerializerByMethodMixin,
+    generics.RetrieveUpdateAPIView,
 ):
 
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [ProductSellerOwner]
+    response_cache_namespace = "products"
 
     queryset = Product.objects.all()
     serializer_map = {
         "GET": ProductListSerializer,
         "PATCH": ProductCreationSerializer,
     }
+
+    def get_queryset(self):
+        if self.request.method == "PATCH":
+            # Locked until the update commits, a concurrent write can't be
+            # overwritten with the values read here.
+            return self.queryset.select_for_update()
+        return self.queryset
+
+    def update(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().update(request, *args, **kwargs)
+
+    def get_object(self):
+        product = super().get_object()
+        # ProductSellerOwner compared seller_id, on writes the seller is the
+        # user already loaded by authentication and is reused as is.
+        if product.seller_id == self.request.user.id:
+            product.seller = self.request.user
+        return product
+
+
+class ProductsSearchView(
+    ReplicaReadsMixin, CachedResponseMixin, generics.ListAPIView
+):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [AuthenticatedSellerOrReadOnly]
+    response_cache_namespace = "products"
+
+    serializer_class = ProductListSerializer
+
+    def list(self, request, *args, **kwargs):
+        params = ProductSearchSerializer(data=request.query_params.dict())
+        params.is_valid(raise_exception=True)
+
+        query = params.validated_data["q"]
+        limit = params.validated_data["limit"]
+        offset = params.validated_data["offset"]
+
+        ids = get_search_backend().search(query, limit + 1, offset)
+        products = Product.objects.in_bulk(ids[:limit])
+        results = [products[pk] for pk in ids[:limit] if pk in products]
+
+        next_link = None
+        max_offset = params.fields["offset"].max_value
+        if len(ids) > limit and offset + limit <= max_offset:
+            next_link = replace_query_param(
+                request.build_absolute_uri(), "offset", offset + limit
+            )
+
+        serializer = self.get_serializer(results, many=True)
+        return Response({"next": next_link, "results": serializer.data})
+
+
+class ProductsInventoryView(ReplicaReadsMixin, generics.RetrieveAPIView):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticatedSeller]
+
+    serializer_class = SellerInventorySerializer
+
+    def get_object(self):
+        # Sellers without products have no row yet.
+        seller_id = self.request.user.id
+        return SellerInventory.objects.filter(
+            seller_id=seller_id
+        ).first() or SellerInventory(seller_id=seller_id)
+
+
+class ProductsExportView(ReplicaReadsMixin, generics.GenericAPIView):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [AuthenticatedSellerOrReadOnly]
+    filter_backends = [ProductFilterBackend]
+
+    queryset = Product.objects.order_by("pk")
+    serializer_class = ProductListSerializer
+    chunk_size = getattr(settings, "PRODUCTS_EXPORT_CHUNK_SIZE", 2000)
+
+    content_types = {
+        "ndjson": "application/x-ndjson",
+        "json": "application/json",
+    }
+
+    def get(self, request):
+        output = request.query_params.get("output", "ndjson")
+        if output not in self.content_types:
+            return Response(
+                {"output": [f"Choose one of {', '.join(self.content_types)}"]},
+                status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if isinstance(request._request, ASGIRequest):
+            rows = self.iter_off_loop(lambda: self.iter_chunks(queryset))
+        else:
+            rows = self.iter_chunks(queryset)
+        if output == "json":
+            rows = self.iter_json_array(rows)
+        else:
+            rows = (chunk + b"\n" for chunk in rows)
+
+        return StreamingHttpResponse(
+            rows, content_type=self.content_types[output]
+        )
+
+    def iter_chunks(self, queryset):
+        if getattr(settings, "PRODUCTS_FAST_SERIALIZATION", False):
+            queryset = ProductListSerializer.values_queryset(queryset)
+            to_representation = ProductListSerializer.to_representation_values
+        else:
+            # One serializer instance for every row, fields are bound once.
+            to_representation = self.get_serializer().to_representation
+
+        chunk = []
+        for product in queryset.iterator(chunk_size=self.chunk_size):
+            chunk.append(json_dumps(to_representation(product)))
+            if len(chunk) == self.chunk_size:
+                yield b"\n".join(chunk)
+                chunk = []
+
+        if chunk:
+            yield b"\n".join(chunk)
+
+    def iter_off_loop(self, make_chunks):
+        """
+        Django 4.0's ASGIHandler iterates streaming content on the event
+        loop, where the ORM refuses to run. The chunks are built on their
+        own thread and handed over one at a time.
+        """
+        chunks = queue.Queue(maxsize=1)
+        stopped = threading.Event()
+        done = object()
+
+        def produce():
+            try:
+                for chunk in make_chunks():
+                    while not stopped.is_set():
+                        try:
+                            chunks.put(chunk, timeout=1)
+                            break
+                        except queue.Full:
+                            pass
+                    if stopped.is_set():
+                        return
+                chunks.put(done)
+            except Exception as err:
+                chunks.put(err)
+            finally:
+                connections.close_all()
+
+        context = contextvars.copy_context()
+        threading.Thread(
+            target=context.run, args=(produce,), daemon=True
+        ).start()
+
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is done:
+                    return
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+        finally:
+            # The client went away or everything was sent.
+            stopped.set()
+
+    def iter_json_array(self, chunks):
+        yield b"["
+        for index, chunk in enumerate(chunks):
+            if index:
+                yield b","
+            yield chunk.replace(b"\n", b",")
+        yield b"]"
+
+
+class ProductsBulkView(generics.GenericAPIView):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [AuthenticatedSellerOrReadOnly]
+    parser_classes = [FastJSONParser, NDJSONParser]
+
+    serializer_class = ProductCreationSerializer
+    update_fields = ["price", "quantity", "is_active"]
+    max_items = getattr(settings, "PRODUCTS_BULK_MAX_ITEMS", 10000)
+    batch_size = getattr(settings, "PRODUCTS_BULK_BATCH_SIZE", 500)
+
+    def check_items(self, items):
+        if not isinstance(items, list) or not items:
+            return Response(
+                {"detail": "Expected a non-empty list of products."},
+                status.HTTP_400_BAD_REQUEST,
+            )
+
+        if len(items) > self.max_items:
+            return Response(
+                {
+                    "detail": "Ensure this list has no more than "
+                    f"{self.max_items} products."
+                },
+                status.HTTP_400_BAD_REQUEST,
+            )
+
+    def post(self, request):
+        items = request.data
+
+        error_response = self.check_items(items)
+        if error_response:
+            return error_response
+
+        validator = self.get_serializer()
+        products = []
+        indexes = []
+        errors = []
+
+        for index, item in enumerate(items):
+            try:
+                validated_data = validator.run_validation(item)
+            except ValidationError as err:
+                errors.append({"index": index, "errors": err.detail})
+                continue
+
+            products.append(Product(seller=request.user, **validated_data))
+            indexes.append(index)
+
+        if products:
+            # bulk_create sends no signals, the inventory is updated here.
+            delta = InventoryDelta()
+            for product in products:
+                delta.add(get_state(product))
+
+            with transaction.atomic():
+                Product.objects.bulk_create(
+                    products, batch_size=self.batch_size
+                )
+                delta.apply()
+            invalidate_namespace("products")
+
+        created = [
+            {"index": index, "id": product.id}
+            for index, product in zip(indexes, products)
+        ]
+
+        if not created:
+            return Response(
+                {"created": created, "errors": errors},
+                status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(
+            {"created": created, "errors": errors}, status.HTTP_201_CREATED
+        )
+
+    def patch(self, request):
+        items = request.data
+
+        error_response = self.check_items(items)
+        if error_response:
+            return error_response
+
+        validator = self.get_serializer(partial=True)
+        patches = {}
+        errors = []
+
+        for index, item in enumerate(items):
+            product_id = item.get("id") if isinstance(item, dict) else None
+
+            if (
+                not isinstance(product_id, int)
+                or isinstance(product_id, bool)
+                or not MIN_INT64 <= product_id <= MAX_INT64
+            ):
+                errors.append(
+                    {
+                        "index": index,
+                        "errors": {"id": ["A valid integer is required."]},
+                    }
+                )
+                continue
+
+            if product_id in patches:
+                errors.append(
+                    {
+                        "index": index,
+                        "errors": {"id": ["Duplicated product id."]},
+                    }
+                )
+                continue
+
+            data = {
+                field: item[field]
+                for field in self.update_fields
+                if field in item
+            }
+            if not data:
+                errors.append(
+                    {
+                        "index": index,
+                        "errors": {
+                            api_settings.NON_FIELD_ERRORS_KEY: [
+                                "Expected at least one of: "
+                                + ", ".join(self.update_fields)
+                                + "."
+                            ]
+                        },
+                    }
+                )
+                continue
+
+            try:
+                validated_data = validator.run_validation(data)
+            except ValidationError as err:
+                errors.append({"index": index, "errors": err.detail})
+                continue
+
+            patches[product_id] = (index, validated_data)
+
+        updated = []
+        delta = InventoryDelta()
+        with transaction.atomic():
+            # Only the user's own rows are loaded and locked.
+            products = (
+                Product.objects.select_for_update()
+                .owned_by(request.user)
+                .filter(id__in=patches)
+                .only("id", "seller_id", *self.update_fields)
+            )
+
+            found = set()
+            fields = set()
+            for product in products:
+                found.add(product.id)
+                index, validated_data = patches[product.id]
+
+                old = get_state(product)
+                for field, value in validated_data.items():
+                    setattr(product, field, value)
+                delta.change(old, get_state(product))
+                fields.update(validated_data)
+                updated.append(product)
+
+            if fields:
+                Product.objects.bulk_update(
+                    updated, sorted(fields), batch_size=self.batch_size
+                )
+                delta.apply()
+
+        if updated:
+            invalidate_namespace("products")
+
+        missing = patches.keys() - found
+        if missing:
+            # Tells other sellers' products from unknown ids, only when
+            # some patches were left out.
+            forbidden = set(
+                Product.objects.filter(id__in=missing).values_list(
+                    "id", flat=True
+                )
+            )
+            for product_id in missing:
+                index = patches[product_id][0]
+                if product_id in forbidden:
+                    detail = (
+                        "You do not have permission to perform this action."
+                    )
+                else:
+                    detail = "Not found."
+                errors.append({"index": index, "errors": {"detail": detail}})
+
+        errors.sort(key=lambda error: error["index"])
+        updated = sorted(
+            (
+                {"index": patches[product.id][0], "id": product.id}
+                for product in updated
+            ),
+            key=lambda row: row["index"],
+        )
+
+        if not updated:
+            return Response(
+                {"updated": updated, "errors": errors},
+                status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response({"updated": updated, "errors": errors})
+
+
+class ProductsReserveView(generics.GenericAPIView):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    serializer_class = ProductReservationSerializer
+    max_items = getattr(settings, "PRODUCTS_RESERVE_MAX_ITEMS", 100)
+
+    def post(self, request):
+        serializer = self.get_serializer(
+            data=request.data, many=True, allow_empty=False
+        )
+        serializer.is_valid(raise_exception=True)
+
+        if len(serializer.validated_data) > self.max_items:
+            return Response(
+                {
+                    "detail": "Ensure this list has no more than "
+                    f"{self.max_items} products."
+                },
+                status.HTTP_400_BAD_REQUEST,
+            )
+
+        quantities = defaultdict(int)
+        for item in serializer.validated_data:
+            quantities[item["id"]] += item["quantity"]
+
+        # Items for the same product can add up past what the column holds,
+        # no stock covers that.
+        oversized = [
+            product_id
+            for product_id, quantity in quantities.items()
+            if quantity > MAX_INT64
+        ]
+
+        try:
+            if oversized:
+                raise InsufficientStockError(oversized)
+            reserve(quantities)
+        except InsufficientStockError as err:
+            return Response(
+                {
+                    "errors": [
+                        {
+                            "id": product_id,
+                            "detail": "Not enough stock or product not "
+                            "available.",
+                        }
+                        for product_id in err.product_ids
+                    ]
+                },
+                status.HTTP_409_CONFLICT,
+            )
+
+        invalidate_namespace("products")
+
+        return Response(
+            {
+                "reserved": [
+                    {"id": product_id, "quantity": quantities[product_id]}
+                    for product_id in sorted(quantities)
+                ]
+            }
+        )
@@ -0,0 +1,47 @@
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+def get_response_cache():
+    # None when no alias is configured, responses aren't cached then.
+    alias = getattr(settings, "RESPONSE_CACHE_ALIAS", None)
+    if alias is None:
+        return None
+    return caches[alias]
+
+
+def get_namespace_version(namespace):
+    cache = get_response_cache()
+    if cache is None:
+        return None
+
+    key = f"{namespace}:version"
+
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, None)
+        version = cache.get(key, 1)
+
+    return version
+
+
+def invalidate_namespace(namespace):
+    # Bumped once the write commits, a read in between would cache the old
+    # rows under the new version.
+    transaction.on_commit(partial(bump_namespace_version, namespace))
+
+
+def bump_namespace_version(namespace):
+    cache = get_response_cache()
+    if cache is None:
+        return
+
+    key = f"{namespace}:version"
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, None)
@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger("komercio.instrumentation")
+
+# Stats of the request being served. Queries may run on other threads than
+# the middleware (sync_to_async, products.async_views.db_executor), those
+# get a copy of the context and record into the same stats.
+current_stats = ContextVar("request_stats", default=None)
+
+
+class RequestStats:
+    def __init__(self, request):
+        self.request = request
+        self.view_name = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.render_started = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            self.queries += 1
+            self.db_time += duration
+
+            threshold = getattr(settings, "SLOW_QUERY_THRESHOLD_MS", 100)
+            if threshold is not None and duration >= threshold:
+                logger.warning(
+                    "Slow query (%.1f ms) in %s %s [%s]: %s",
+                    duration,
+                    self.request.method,
+                    self.request.path,
+                    self.view_name or "unknown view",
+                    sql,
+                )
+
+
+def record_query(execute, sql, params, many, context):
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def install_wrapper(sender=None, connection=None, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+# Every connection, on whichever thread opens it, reports to current_stats.
+connection_created.connect(install_wrapper)
+
+
+class Metrics:
+    def __init__(self):
+        self._views = {}
+        self._lock = threading.Lock()
+
+    def record(self, view_name, queries, db_time, render_time, total, size):
+        with self._lock:
+            view = self._views.setdefault(
+                view_name,
+                {
+                    "requests": 0,
+                    "queries": 0,
+                    "db_time": 0.0,
+                    "render_time": 0.0,
+                    "total_time": 0.0,
+                    "max_time": 0.0,
+                    "response_bytes": 0,
+                },
+            )
+            view["requests"] += 1
+            view["queries"] += queries
+            view["db_time"] += db_time
+            view["render_time"] += render_time
+            view["total_time"] += total
+            view["max_time"] = max(view["max_time"], total)
+            view["response_bytes"] += size or 0
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                view_name: {
+                    **view,
+                    "mean_queries": view["queries"] / view["requests"],
+                    "mean_time": view["total_time"] / view["requests"],
+                }
+                for view_name, view in self._views.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+metrics = Metrics()
+
+
+class InstrumentationMiddleware:
+    """
+    Counts queries and DB time per request, times DRF rendering, logs
+    queries slower than SLOW_QUERY_THRESHOLD_MS and reports everything in a
+    Server-Timing header and in the process-wide `metrics`.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        # Same switch as django.utils.deprecation.MiddlewareMixin, so async
+        # views don't get pushed into a thread by this middleware.
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        stats = RequestStats(request)
+        request._instrumentation = stats
+
+        start = time.perf_counter()
+        token = self.start(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+
+        return self.finish(stats, start, response)
+
+    async def __acall__(self, request):
+        stats = RequestStats(request)
+        request._instrumentation = stats
+
+        start = time.perf_counter()
+        token = self.start(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+
+        return self.finish(stats, start, response)
+
+    def start(self, stats):
+        # Connections opened before this module was imported missed the
+        # connection_created signal.
+        for connection in connections.all():
+            install_wrapper(connection=connection)
+        return current_stats.set(stats)
+
+    def finish(self, stats, start, response):
+        total = (time.perf_counter() - start) * 1000
+
+        size = None if response.streaming else len(response.content)
+        view_name = stats.view_name or "unknown"
+        metrics.record(
+            view_name,
+            stats.queries,
+            stats.db_time,
+            stats.render_time,
+            total,
+            size,
+        )
+
+        response["X-Query-Count"] = str(stats.queries)
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={stats.db_time:.2f};desc="{stats.queries} queries"',
+                f"render;dur={stats.render_time:.2f}",
+                f"view;dur={total - stats.db_time - stats.render_time:.2f}",
+                f"total;dur={total:.2f}",
+            ]
+        )
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, "view_class", None)
+        request._instrumentation.view_name = (
+            view_class.__name__ if view_class else view_func.__name__
+        )
+
+    def process_template_response(self, request, response):
+        stats = request._instrumentation
+        stats.render_started = time.perf_counter()
+
+        def stop_render_timer(response):
+            stats.render_time = (
+                time.perf_counter() - stats.render_started
+            ) * 1000
+
+        response.add_post_render_callback(stop_render_timer)
+        return response
@@ -1,5 +1,105 @@
+import hashlib
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import parse_etags
+from django.utils.http import urlencode
+
+from utils.cache import get_namespace_version, get_response_cache
+from utils.routers import use_primary, use_replicas
+
+
 class SerializerByMethodMixin:
     def get_serializer_class(self, *args, **kwargs):
         return self.serializer_map.get(
             self.request.method, self.serializer_class
         )
+
+
+class ReplicaReadsMixin:
+    """
+    Safe requests read from the replicas once the user is authenticated,
+    unless they wrote something in the last REPLICA_STICKY_SECONDS.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        use_replicas(request, request.user)
+
+
+class CachedResponseMixin:
+    """
+    Caches rendered JSON GET responses keyed on path and query params and
+    answers If-None-Match with 304. Entries live under the view's
+    `response_cache_namespace` and are dropped all at once by
+    `utils.cache.invalidate_namespace`. Misses are filled from default, a
+    lagging replica would cache rows older than the namespace version.
+    """
+
+    response_cache_namespace = None
+    response_cache_timeout = getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300)
+
+    def get(self, request, *args, **kwargs):
+        cache = get_response_cache()
+        if cache is None or request.accepted_renderer.format != "json":
+            return super().get(request, *args, **kwargs)
+
+        key = self.get_response_cache_key(request)
+
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type, etag = cached
+            return self.build_cached_response(
+                request, content, content_type, etag
+            )
+
+        use_primary()
+        response = super().get(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+
+        def store(response):
+            etag = '"%s"' % hashlib.sha1(response.content).hexdigest()
+            content_type = response["Content-Type"]
+            cache.set(
+                key,
+                (response.content, content_type, etag),
+                self.response_cache_timeout,
+            )
+            response["ETag"] = etag
+
+            if self.etag_matches(request, etag):
+                return self.build_cached_response(
+                    request, response.content, content_type, etag
+                )
+
+        response.add_post_render_callback(store)
+        return response
+
+    def get_response_cache_key(self, request):
+        version = get_namespace_version(self.response_cache_namespace)
+        params = urlencode(sorted(request.query_params.lists()), doseq=True)
+        digest = hashlib.md5(
+            f"{request.path}?{params}".encode("utf-8")
+        ).hexdigest()
+
+        return f"{self.response_cache_namespace}:response:{version}:{digest}"
+
+    def etag_matches(self, request, etag):
+        if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+        if not if_none_match:
+            return False
+
+        return if_none_match.strip() == "*" or etag in parse_etags(
+            if_none_match
+        )
+
+    def build_cached_response(self, request, content, content_type, etag):
+        if self.etag_matches(request, etag):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type=content_type)
+
+        response["ETag"] = etag
+        response["Vary"] = "Accept"
+        return response
@@ -0,0 +1,63 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Same settings as DRF's JSONRenderer with its default COMPACT_JSON,
+# UNICODE_JSON and STRICT_JSON.
+encoder = encoders.JSONEncoder(
+    ensure_ascii=False, allow_nan=False, separators=(",", ":")
+)
+
+if orjson is not None:
+    # Datetimes go through DRF's encoder, which writes UTC as "Z" and cuts
+    # microseconds to milliseconds.
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def escape_line_separators(content):
+    # Valid JSON but not valid JavaScript, DRF escapes them too.
+    if b"\xe2\x80" in content:
+        content = content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+    return content
+
+
+def stdlib_dumps(data):
+    return escape_line_separators(encoder.encode(data).encode("utf-8"))
+
+
+def json_dumps(data):
+    # Compact UTF-8 JSON bytes, the same output DRF's JSONRenderer gives,
+    # through orjson when it is installed. The one difference: orjson
+    # writes NaN and infinities as null where DRF raises ValueError.
+    if orjson is None:
+        return stdlib_dumps(data)
+
+    try:
+        content = orjson.dumps(
+            data, default=encoder.default, option=ORJSON_OPTIONS
+        )
+    except TypeError:
+        # Integers wider than 64 bits, keys orjson can't write, ...
+        return stdlib_dumps(data)
+
+    return escape_line_separators(content)
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        renderer_context = renderer_context or {}
+        if orjson is None or self.get_indent(
+            accepted_media_type, renderer_context
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        return json_dumps(data)
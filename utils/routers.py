@@ -0,0 +1,165 @@
+import asyncio
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class RoutingState:
+    """
+    Per-request routing flags. `use_replicas` lets reads go to a replica,
+    `wrote` is set by the router once anything was written on default.
+    """
+
+    __slots__ = ("use_replicas", "wrote")
+
+    def __init__(self):
+        self.use_replicas = False
+        self.wrote = False
+
+
+routing_state = ContextVar("routing_state", default=None)
+
+
+def get_replicas():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+def get_pin_key(user_id):
+    return f"db-pinned:{user_id}"
+
+
+def get_pin_cache():
+    # Pins have to be seen by whichever worker serves the next request.
+    alias = getattr(settings, "REPLICA_PIN_CACHE_ALIAS", None)
+    if alias is None:
+        return None
+    return caches[alias]
+
+
+def pin_to_primary(user):
+    """
+    Sends the user's reads to default for REPLICA_STICKY_SECONDS, so they
+    read their own writes while the replicas catch up.
+    """
+    cache = get_pin_cache()
+    if not get_replicas() or cache is None or not user.is_authenticated:
+        return
+
+    cache.set(
+        get_pin_key(user.pk),
+        True,
+        getattr(settings, "REPLICA_STICKY_SECONDS", 5),
+    )
+
+
+def is_pinned_to_primary(user):
+    if not get_replicas() or not user.is_authenticated:
+        return False
+
+    cache = get_pin_cache()
+    if cache is None:
+        # Without somewhere to keep pins nobody could read their own
+        # writes, authenticated reads stay on default.
+        return True
+
+    return cache.get(get_pin_key(user.pk)) is not None
+
+
+def use_replicas(request, user):
+    state = routing_state.get()
+    if (
+        state is not None
+        and request.method in SAFE_METHODS
+        and not is_pinned_to_primary(user)
+    ):
+        state.use_replicas = True
+
+
+def use_primary():
+    # The rest of the current request reads from default again.
+    state = routing_state.get()
+    if state is not None:
+        state.use_replicas = False
+
+
+class ReplicaRouter:
+    """
+    Sends reads to a random replica when the current request allows it, see
+    ReplicaReadsMiddleware and utils.mixins.ReplicaReadsMixin. Writes and
+    every other read go to `default`.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = routing_state.get()
+        replicas = get_replicas()
+        if replicas and state is not None and state.use_replicas:
+            return random.choice(replicas)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        state = routing_state.get()
+        if state is not None:
+            state.wrote = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
+
+
+class ReplicaReadsMiddleware:
+    """
+    Sets up the routing state of each request and pins users who wrote
+    something to default. Plain function views opt into replica reads with
+    a `replica_reads = True` attribute, DRF views with ReplicaReadsMixin so
+    the check runs after token authentication.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        state = RoutingState()
+        token = routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing_state.reset(token)
+
+        return self.finish(request, state, response)
+
+    async def __acall__(self, request):
+        state = RoutingState()
+        token = routing_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routing_state.reset(token)
+
+        return self.finish(request, state, response)
+
+    def finish(self, request, state, response):
+        # DRF copies the user it authenticated onto the Django request.
+        user = getattr(request, "user", None)
+        if state.wrote and user is not None and response.status_code < 400:
+            pin_to_primary(user)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if getattr(view_func, "replica_reads", False):
+            use_replicas(request, request.user)
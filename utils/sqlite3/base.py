@@ -0,0 +1,36 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Django's SQLite backend plus OPTIONS["pragmas"], a mapping of PRAGMA
+    names to values run on every new connection (journal_mode=WAL, ...),
+    and OPTIONS["transaction_mode"], how atomic blocks BEGIN (DEFERRED,
+    IMMEDIATE or EXCLUSIVE).
+    """
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.pragmas = kwargs.pop("pragmas", {})
+        self.transaction_mode = kwargs.pop("transaction_mode", None)
+        return kwargs
+
+    def _start_transaction_under_autocommit(self):
+        # A DEFERRED transaction that read first can't wait for the write
+        # lock, SQLite fails it with "database is locked" whatever the
+        # timeout. IMMEDIATE takes the lock at BEGIN, waiting if needed.
+        if self.transaction_mode is None:
+            return super()._start_transaction_under_autocommit()
+        self.cursor().execute(f"BEGIN {self.transaction_mode}")
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            # journal_mode is stored in the file and changing it needs an
+            # exclusive lock, only touch it when it differs.
+            if name == "journal_mode":
+                (current,) = conn.execute("PRAGMA journal_mode").fetchone()
+                if current.lower() == str(value).lower():
+                    continue
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
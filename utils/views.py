@@ -0,0 +1,20 @@
+from accounts.hashing import hashing_service
+from products.authentications import CachedTokenAuthentication
+from rest_framework import views
+from rest_framework.views import Response
+
+from utils.instrumentation import metrics
+from utils.permissions import IsSuperuser
+
+
+class MetricsView(views.APIView):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsSuperuser]
+
+    def get(self, request):
+        return Response(
+            {
+                **metrics.snapshot(),
+                "password_hashing": hashing_service.snapshot(),
+            }
+        )